@@ -0,0 +1,60 @@
+import warnings
+import numpy as np
+
+# === אנליטיקה וקטורית על מטריצת Close (תאריכים × סימבולים) — מעבר אחד לכל היקום ===
+STREAK_TREND_DAYS = 2    # רצף של 2 שינויים באותו כיוון = "מַמְשִׁיךְ לַעֲלוֹת/לְרֵדֶת"
+VOL_WINDOW = 20          # ימים לחישוב התנודתיות
+VOL_MIN_RETURNS = 10     # פחות מזה — אין תנודתיות, חוזרים לסף הקבוע של המכשיר
+SHARP_SIGMA = 2.0        # "בְּחַדוּת": שינוי של 2 סטיות תקן ומעלה
+SHARP_MIN_PCT = 0.5      # ...ולא פחות מחצי אחוז (מכשיר שקט במיוחד)
+HIGH_WINDOW = 252        # שנת מסחר
+HIGH_MIN_BARS = 200      # פחות מזה — אין שיא שנתי אמין
+NEAR_HIGH_PCT = 1.0      # "סָמוּךְ לַשִּׂיא הַשְּׁנָתִי": עד 1% מתחת לשיא
+
+# * דחיסה: הערכים התקינים של כל עמודה בסוף, NaN בהתחלה (שקול ל־dropna לכל טור)
+def pack_valid(values):
+    valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
+
+# * כל המדדים לכל העמודות: מחזיר מילון של מערכים באורך מספר הסימבולים
+def compute_analytics(values):
+    """
+    values: מערך float (ימים × סימבולים) עם NaN לימים חסרים.
+    pct — שינוי יומי באחוזים; streak — רצף השינויים האחרון (חיובי עלייה, שלילי ירידה);
+    sharp — |pct| מעל SHARP_SIGMA סטיות תקן של התשואות הקודמות (NaN כשאין מספיק היסטוריה);
+    from_high — מרחק באחוזים מהשיא של HIGH_WINDOW הימים (≤0; NaN כשאין מספיק היסטוריה).
+    """
+    packed, counts = pack_valid(values)
+    if packed.shape[0] < 3:
+        packed = np.vstack([np.full((3 - packed.shape[0], packed.shape[1]), np.nan), packed])
+
+    current = packed[-1]
+    prev = packed[-2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(prev != 0, (current - prev) / prev * 100, 0.0)
+        returns = np.diff(packed, axis=0) / packed[:-1] * 100
+
+    # * רצף: אורך הריצה האחרונה של אותו סימן, מהסוף אחורה
+    signs = np.nan_to_num(np.sign(np.diff(packed, axis=0)))
+    same = (signs == signs[-1]) & (signs[-1] != 0)
+    streak = np.cumprod(same[::-1], axis=0).sum(axis=0) * signs[-1]
+
+    # * תנודתיות: סטיית תקן של התשואות שלפני היום
+    history = returns[-VOL_WINDOW - 1:-1]
+    enough = (~np.isnan(history)).sum(axis=0) >= VOL_MIN_RETURNS
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # עמודות ריקות כולן NaN
+        vol = np.nanstd(history, axis=0, ddof=1)
+        high = np.nanmax(packed[-HIGH_WINDOW:], axis=0)
+    sharp = np.where(enough & (vol > 0), (np.abs(pct) >= SHARP_SIGMA * vol) & (np.abs(pct) >= SHARP_MIN_PCT), np.nan)
+    from_high = np.where(counts >= HIGH_MIN_BARS, (current / high - 1) * 100, np.nan)
+
+    return {
+        "counts": counts,
+        "current": current,
+        "pct": pct,
+        "streak": streak,
+        "sharp": sharp,
+        "from_high": from_high,
+    }
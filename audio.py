@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+import subprocess
+import urllib.request
+import tarfile
+import wave
+from tracing import span, cache_result
+
+try:
+    import miniaudio  # פענוח MP3 ודגימה מחדש בתוך התהליך, בלי ffmpeg
+except ImportError:
+    miniaudio = None
+
+# === הגדרות שמע ===
+FFMPEG_PATH = "./bin/ffmpeg"
+TRANSCODER = "native"   # "native" — miniaudio בתוך התהליך; "ffmpeg" — תהליך חיצוני (גיבוי)
+VOICE = "he-IL-AvriNeural"
+SAMPLE_RATE = 8000      # פורמט ימות המשיח: 8kHz מונו pcm_s16le
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+# === מטמון שמע לפי מקטע ===
+TTS_CACHE_DIR = "cache/tts"
+TTS_CACHE_MAX_AGE = 7 * 24 * 3600   # מקטע שלא נוגן שבוע — נמחק
+TTS_CONCURRENCY = 4                 # מקטעים בסינתזה במקביל
+SECTION_GAP_MS = 400                # שקט בין מקטעים
+
+# * edge_tts (ו־aiohttp מתחתיו) נטען בשימוש הראשון; אפשר להחליף את Communicate מבחוץ (benchmark.py)
+Communicate = None
+
+def _communicate(text, voice):
+    global Communicate
+    if Communicate is None:
+        from edge_tts import Communicate
+    return Communicate(text, voice=voice)
+
+# === מבטיח ש־ffmpeg מותקן ===
+def ensure_ffmpeg():
+    if not os.path.exists(FFMPEG_PATH):
+        print("⬇️ מוריד ffmpeg...")
+        os.makedirs("bin", exist_ok=True)
+        url = "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz"
+        archive_path = "bin/ffmpeg.tar.xz"
+        extract_path = "bin"
+        urllib.request.urlretrieve(url, archive_path)
+        with tarfile.open(archive_path) as tar:
+            tar.extractall(path=extract_path)
+        for root, dirs, files in os.walk(extract_path):
+            for file in files:
+                if file == "ffmpeg":
+                    os.rename(os.path.join(root, file), FFMPEG_PATH)
+                    os.chmod(FFMPEG_PATH, 0o755)
+                    break
+
+# === ממיר טקסט ל־MP3 ===
+async def text_to_speech(text, filename):
+    communicate = _communicate(text, VOICE)
+    with span("tts.save", chars=len(text)):
+        await communicate.save(filename)
+
+# * האם להשתמש בממיר הפנימי (רק אם נבחר ו־miniaudio מותקן)
+def use_native_transcoder():
+    return TRANSCODER == "native" and miniaudio is not None
+
+# * MP3 (bytes) → PCM גולמי 8kHz מונו 16bit, בתוך התהליך
+def decode_mp3_to_pcm(mp3):
+    decoded = miniaudio.decode(
+        bytes(mp3),
+        output_format=miniaudio.SampleFormat.SIGNED16,
+        nchannels=CHANNELS,
+        sample_rate=SAMPLE_RATE,
+    )
+    return decoded.samples.tobytes()
+
+# === ממיר מ־MP3 ל־WAV בפורמט של ימות המשיח ===
+def convert_to_wav(mp3_file, wav_file):
+    if use_native_transcoder():
+        with span("transcode", mode="native") as attrs, open(mp3_file, "rb") as f:
+            mp3 = f.read()
+            attrs["bytes"] = len(mp3)
+            wav = pcm_to_wav(decode_mp3_to_pcm(mp3))
+        with open(wav_file, "wb") as f:
+            f.write(wav)
+        return
+    ensure_ffmpeg()
+    with span("transcode", mode="ffmpeg"), open(os.devnull, 'w') as devnull:
+        subprocess.run(
+            [FFMPEG_PATH, "-y", "-i", mp3_file, "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS), "-acodec", "pcm_s16le", wav_file],
+            stdout=devnull,
+            stderr=devnull
+        )
+
+# * עטיפת PCM גולמי בכותרת WAV (בזיכרון)
+def pcm_to_wav(pcm):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+# === טקסט → PCM (8kHz מונו), לפי הממיר שנבחר ===
+async def synthesize_pcm(text, voice=VOICE):
+    if use_native_transcoder():
+        return await _synthesize_pcm_native(text, voice)
+    return await _synthesize_pcm_ffmpeg(text, voice)
+
+# * ממיר פנימי: אוסף את ה־MP3 מהזרם ומפענח ב־thread — בלי הורדת ffmpeg ובלי spawn
+async def _synthesize_pcm_native(text, voice):
+    mp3 = bytearray()
+    with span("tts.stream", chars=len(text)) as attrs:
+        async for chunk in _communicate(text, voice).stream():
+            if chunk["type"] == "audio":
+                mp3.extend(chunk["data"])
+        attrs["bytes"] = len(mp3)
+    with span("transcode", mode="native", bytes=len(mp3)):
+        return await asyncio.get_running_loop().run_in_executor(None, decode_mp3_to_pcm, mp3)
+
+# * סטרימינג: edge-tts → stdin של ffmpeg → PCM מ־stdout, בלי קבצים זמניים
+async def _synthesize_pcm_ffmpeg(text, voice):
+    """
+    מזרים את נתחי ה־MP3 מ־Communicate.stream() ישירות ל־ffmpeg בזמן שהם מגיעים,
+    וקורא במקביל את ה־PCM (8kHz מונו) — הסינתזה וההמרה חופפות בזמן.
+    """
+    ensure_ffmpeg()
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+        "-f", "mp3", "-i", "pipe:0",
+        "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def feed():
+        try:
+            async for chunk in _communicate(text, voice).stream():
+                if chunk["type"] == "audio":
+                    proc.stdin.write(chunk["data"])
+                    await proc.stdin.drain()
+        finally:
+            proc.stdin.close()
+
+    try:
+        with span("tts.stream", chars=len(text), mode="ffmpeg") as attrs:
+            _, pcm = await asyncio.gather(feed(), proc.stdout.read())
+            attrs["bytes"] = len(pcm)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    if await proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg נכשל (קוד {proc.returncode})")
+    return pcm
+
+# * פירוק הדו״ח למקטעים (פתיח, ישראל, עולם, מניות, קריפטו, סחורות, דולר)
+def split_sections(text):
+    return [section.strip() for section in text.split("\n\n") if section.strip()]
+
+def _section_cache_path(text, voice):
+    key = hashlib.sha256(f"{voice}\0{SAMPLE_RATE}\0{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.pcm")
+
+# * PCM למקטע — מהמטמון אם הטקסט והקול זהים, אחרת סינתזה ושמירה
+async def section_pcm(text, voice=VOICE):
+    path = _section_cache_path(text, voice)
+    if os.path.exists(path):
+        os.utime(path)
+        with open(path, "rb") as f:
+            pcm = f.read()
+        cache_result("tts", True, bytes=len(pcm))
+        return pcm
+    cache_result("tts", False)
+    pcm = await synthesize_pcm(text, voice=voice)
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pcm)
+    os.replace(tmp_path, path)
+    return pcm
+
+def prune_tts_cache(max_age=TTS_CACHE_MAX_AGE):
+    if not os.path.isdir(TTS_CACHE_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(TTS_CACHE_DIR):
+        path = os.path.join(TTS_CACHE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+# === סינתזה לפי מקטעים, במקביל, עם מטמון — ושרשור ל־WAV אחד ===
+# * כמה דו״חות בבת אחת: מקטע שמופיע בכמה דו״חות (פתיח, קריפטו...) מסונתז פעם אחת
+async def synthesize_reports_wav(texts, voice=VOICE, concurrency=TTS_CONCURRENCY):
+    """
+    texts: {שם: טקסט}. מחזיר {שם: bytes של WAV}.
+    כל מקטע מסונתז בנפרד ובמקביל; מקטע שלא השתנה מאז הריצה הקודמת נלקח מהמטמון.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(section):
+        async with semaphore:
+            return await section_pcm(section, voice=voice)
+
+    sections = {name: split_sections(text) for name, text in texts.items()}
+    unique = list(dict.fromkeys(section for parts in sections.values() for section in parts))
+    pcm = dict(zip(unique, await asyncio.gather(*(limited(section) for section in unique))))
+    prune_tts_cache()
+    gap = b"\x00" * (SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS * SECTION_GAP_MS // 1000)
+    return {name: pcm_to_wav(gap.join(pcm[section] for section in parts)) for name, parts in sections.items()}
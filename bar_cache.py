@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# === מטמון נרות יומיים על הדיסק (SQLite) ===
+# נר שנסגר (כל יום לפני הנר האחרון) לא משתנה — נשמר לתמיד.
+# הנר האחרון עשוי להיות חלקי (יום מסחר פתוח) — נשלף מחדש אחרי TODAY_TTL שניות.
+# fetched.full — כבר בוצעה לסימבול שליפה מלאה (כל ההיסטוריה שיש ל־Yahoo), כך שסימבול
+# עם היסטוריה קצרה (הנפקה חדשה, סדרה עם חורים) לא נשלף במלואו שוב ושוב.
+CACHE_PATH = "cache/bars.sqlite"
+TODAY_TTL = 120
+ADJUST_TOLERANCE = 1e-5   # הפרש יחסי בסגירה של נר סגור מעבר לזה — Yahoo תיאם מחדש (פיצול/דיבידנד)
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    day    TEXT NOT NULL,
+    open   REAL,
+    high   REAL,
+    low    REAL,
+    close  REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, day)
+);
+CREATE TABLE IF NOT EXISTS fetched (
+    symbol     TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    full       INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# * מטמון מגרסה קודמת (בלי fetched.full): העמודה נוספת, וכל סימבול יישלף במלואו פעם אחת
+def _migrate(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(fetched)")]
+    if "full" not in columns:
+        conn.execute("ALTER TABLE fetched ADD COLUMN full INTEGER NOT NULL DEFAULT 0")
+
+@contextmanager
+def _connect(path=CACHE_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        _migrate(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+# * תוכנית עדכון: לכל סימבול — דילוג / שליפה מתאריך / שליפה מלאה
+def plan_updates(symbols, path=CACHE_PATH, ttl=TODAY_TTL, now=None, full_history=False, settled=None):
+    """
+    מחזיר {סימבול: start} עבור הסימבולים שצריך לשלוף:
+    start=None — אין כלום במטמון, או (full_history) שעוד לא בוצעה לו שליפה מלאה;
+    start="YYYY-MM-DD" — היום שלפני האחרון שבמטמון, כולל: הנר האחרון מתרענן (אולי היה חלקי),
+    והנר שלפניו — נר סגור — משמש להשוואה מול המטמון (adjusted_symbols).
+    סימבול שנשלף לפני פחות מ־ttl שניות לא מופיע בתוכנית, וגם לא סימבול שהבורסה שלו
+    סגורה מאז השליפה האחרונה — settled(symbol, fetched_at, now) מחזיר True.
+    """
+    now = time.time() if now is None else now
+    plan = {}
+    with _connect(path) as conn:
+        for symbol in dict.fromkeys(symbols):
+            row = conn.execute(
+                "SELECT fetched_at, (SELECT MIN(day) FROM "
+                "(SELECT day FROM bars WHERE symbol = ? ORDER BY day DESC LIMIT 2)), full "
+                "FROM fetched WHERE symbol = ?",
+                (symbol, symbol),
+            ).fetchone()
+            if row is None or row[1] is None:
+                plan[symbol] = None
+            elif now - row[0] >= ttl and not (settled and settled(symbol, row[0], now)):
+                plan[symbol] = None if full_history and not row[2] else row[1]
+    return plan
+
+# * שמירת נרות: frame עם עמודות (שדה, סימבול) כמו ב־yf.download;
+# full — ה־frame הוא שליפה מלאה: מחליף את כל הנרות של הסימבול (הסימון נשמר גם אחרי שליפות חלקיות בהמשך)
+def store_bars(frame, symbols, path=CACHE_PATH, now=None, full=False):
+    import pandas as pd
+    now = time.time() if now is None else now
+    rows = []
+    stored = []
+    for symbol in symbols:
+        try:
+            bars = frame.xs(symbol, axis=1, level=1).reindex(columns=BAR_COLUMNS)
+        except KeyError:
+            continue
+        bars = bars.dropna(subset=["Close"])
+        if bars.empty:
+            continue
+        stored.append(symbol)
+        for ts, bar in bars.iterrows():
+            rows.append((symbol, pd.Timestamp(ts).strftime("%Y-%m-%d"),
+                         *(None if pd.isna(v) else float(v) for v in bar.tolist())))
+    if not stored:
+        return stored
+    with _connect(path) as conn:
+        if full:
+            conn.executemany("DELETE FROM bars WHERE symbol = ?", [(s,) for s in stored])
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany(
+            "INSERT INTO fetched VALUES (?, ?, ?) ON CONFLICT(symbol) DO UPDATE SET "
+            "fetched_at = excluded.fetched_at, full = MAX(full, excluded.full)",
+            [(s, now, int(full)) for s in stored],
+        )
+    return stored
+
+# * נרות מותאמים (auto_adjust): אחרי פיצול או דיבידנד Yahoo מתאם מחדש את כל ההיסטוריה,
+# והמטמון כבר לא תואם. מחזיר את הסימבולים שסגירה של נר סגור ב־frame (כל נר חופף מלבד
+# האחרון שבמטמון, שאולי היה חלקי) שונה מהסגירה השמורה — אותם צריך לשלוף במלואם מחדש.
+def adjusted_symbols(frame, symbols, path=CACHE_PATH, tolerance=ADJUST_TOLERANCE):
+    import pandas as pd
+    adjusted = []
+    with _connect(path) as conn:
+        for symbol in symbols:
+            try:
+                closes = frame.xs(symbol, axis=1, level=1)["Close"].dropna()
+            except KeyError:
+                continue
+            fresh = {pd.Timestamp(ts).strftime("%Y-%m-%d"): float(v) for ts, v in closes.items()}
+            if not fresh:
+                continue
+            rows = conn.execute(
+                "SELECT day, close FROM bars WHERE symbol = ? AND day >= ? ORDER BY day",
+                (symbol, min(fresh)),
+            ).fetchall()
+            if any(day in fresh and close and abs(fresh[day] / close - 1) > tolerance for day, close in rows[:-1]):
+                adjusted.append(symbol)
+    return adjusted
+
+# * טעינת מטריצת Close רחבה — N הנרות האחרונים לכל סימבול
+def load_closes(symbols, bars=10, path=CACHE_PATH):
+    import pandas as pd
+    symbols = list(dict.fromkeys(symbols))
+    series = {}
+    with _connect(path) as conn:
+        for symbol in symbols:
+            rows = conn.execute(
+                "SELECT day, close FROM bars WHERE symbol = ? ORDER BY day DESC LIMIT ?",
+                (symbol, bars),
+            ).fetchall()
+            if rows:
+                days, closes = zip(*reversed(rows))
+                series[symbol] = pd.Series(closes, index=pd.to_datetime(list(days)), dtype="float64")
+    frame = pd.DataFrame(series).sort_index()
+    return frame.reindex(columns=symbols)
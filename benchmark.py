@@ -0,0 +1,386 @@
+import argparse
+import asyncio
+import datetime
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+
+# === בנצ'מרק לא מקוון: נתונים מוקלטים, זמן מוקפא, TTS והעלאה מקומיים ===
+# מריץ את הצינור המלא בלי Yahoo, בלי Microsoft TTS ובלי call2all:
+#   python benchmark.py                  — כל השלבים, טבלת זמנים
+#   python benchmark.py --json out.json  — גם סיכום JSON (להשוואה בין גרסאות)
+#   python benchmark.py record           — הקלטת נרות אמיתיים מ־Yahoo ל־FIXTURE_PATH (דורש רשת)
+# אין קובץ הקלטה — נוצרים נרות סינתטיים דטרמיניסטיים לכל סימבול.
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "daily.csv")
+ITERATIONS = 20
+FIXTURE_DAYS = 260
+FIXTURE_END = datetime.date(2026, 10, 16)
+
+# * זמן עלייה: import main (מדוד עם -X importtime), ומודולים כבדים שאסור שייטענו במסלול המהיר
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET_MS = 300
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "edge_tts", "aiohttp", "requests", "num2words")
+
+# * ענפי מצב השוק — זמן מוקפא (שעון ירושלים) לכל אחד
+BRANCHES = {
+    "weekend": datetime.datetime(2026, 10, 17, 12, 0),      # שבת: ת״א סגורה, ארה״ב weekend
+    "pre-open": datetime.datetime(2026, 10, 12, 9, 0),      # לפני פתיחת ת״א
+    "tase-open": datetime.datetime(2026, 10, 12, 15, 0),    # ת״א פתוחה, ארה״ב pre
+    "live": datetime.datetime(2026, 10, 12, 17, 0),         # שתיהן פתוחות
+    "post-close": datetime.datetime(2026, 10, 12, 23, 30),  # ת״א סגורה, ארה״ב post
+}
+
+# * TTS מקומי: MP3 תקני (פריימים שקטים, MPEG-2 Layer III 24kHz 48kbps מונו — כמו edge-tts)
+MP3_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC0]) + bytes(140)   # 576 דגימות = 24ms
+TTS_FIRST_BYTE = 0.15     # שניות עד הנתח הראשון
+TTS_REALTIME = 20.0       # מהירות הסינתזה ביחס לזמן הדיבור
+CHARS_PER_SECOND = 14.0   # קצב דיבור משוער
+STREAM_CHUNK_FRAMES = 50
+
+def speech_mp3(text):
+    seconds = max(0.5, len(text) / CHARS_PER_SECOND)
+    return MP3_FRAME * int(seconds / 0.024)
+
+class LocalCommunicate:
+    """תחליף ל־edge_tts.Communicate: אותו ממשק (stream/save), השהיה מדומה ו־MP3 תקני."""
+
+    def __init__(self, text, voice=None, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        mp3 = speech_mp3(self.text)
+        await asyncio.sleep(TTS_FIRST_BYTE)
+        step = len(MP3_FRAME) * STREAM_CHUNK_FRAMES
+        per_chunk = STREAM_CHUNK_FRAMES * 0.024 / TTS_REALTIME
+        for i in range(0, len(mp3), step):
+            await asyncio.sleep(per_chunk)
+            yield {"type": "audio", "data": mp3[i:i + step]}
+
+    async def save(self, filename):
+        with open(filename, "wb") as f:
+            async for chunk in self.stream():
+                f.write(chunk["data"])
+
+# * שרת העלאה מקומי במקום UploadFile של ימות המשיח
+class UploadHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"responseStatus": "OK"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_upload_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), UploadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/ym/api/UploadFile"
+
+# === נתונים מוקלטים ===
+def all_symbols():
+    import market_text
+    symbols = {}
+    for sections in market_text.PROFILES.values():
+        for _, _, branches in sections:
+            for _, lines in branches.values():
+                symbols.update(dict.fromkeys(inst.symbol for inst, _ in lines))
+    return list(symbols)
+
+def synthetic_fixture(symbols):
+    import numpy as np
+    import pandas as pd
+    days = pd.bdate_range(end=FIXTURE_END, periods=FIXTURE_DAYS)
+    rows = []
+    for symbol in symbols:
+        seed = zlib.crc32(symbol.encode())
+        rng = np.random.default_rng(seed)
+        close = (10 + seed % 5000) * np.cumprod(1 + rng.normal(0.0003, 0.012, len(days)))
+        for day, c in zip(days, close):
+            rows.append((symbol, day, c * 0.995, c * 1.01, c * 0.99, c, float(rng.integers(1e5, 1e7))))
+    return pd.DataFrame(rows, columns=["symbol", "day", "Open", "High", "Low", "Close", "Volume"])
+
+def load_fixture(symbols, path=FIXTURE_PATH):
+    import pandas as pd
+    if os.path.exists(path):
+        fixture = pd.read_csv(path, parse_dates=["day"])
+        missing = [s for s in symbols if s not in set(fixture["symbol"])]
+        if missing:
+            fixture = pd.concat([fixture, synthetic_fixture(missing)], ignore_index=True)
+        return fixture, "recorded"
+    return synthetic_fixture(symbols), "synthetic"
+
+def record_fixture(path=FIXTURE_PATH):
+    import market_data
+    symbols = all_symbols()
+    frame = market_data.download_bars(symbols)
+    long = frame.stack(level=1, future_stack=True).rename_axis(["day", "symbol"]).reset_index()
+    long = long.dropna(subset=["Close"])[["symbol", "day", "Open", "High", "Low", "Close", "Volume"]]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    long.to_csv(path, index=False)
+    print(f"💾 {len(long)} נרות ל־{long['symbol'].nunique()} סימבולים → {path}")
+
+# * החלפת המקורות החיצוניים: Yahoo (יומי/תוך־יומי/טיקר בודד), Communicate, UploadFile, השעון
+def install_stand_ins(fixture, upload_url):
+    import numpy as np
+    import pandas as pd
+    import pytz
+    import audio
+    import bar_cache
+    import intraday
+    import market_data
+    import market_text
+    import snapshot_store
+    import uploader
+
+    wide = fixture.pivot(index="day", columns="symbol")
+    clock = {"now": None}
+
+    def download_bars(symbols, start=None, timeout=None):
+        today = pd.Timestamp(clock["now"].date())
+        frame = wide.loc[wide.index <= today]
+        frame = frame.loc[frame.index >= pd.Timestamp(start)] if start else frame.iloc[-FIXTURE_DAYS:]
+        return frame.loc[:, frame.columns.get_level_values(1).isin(list(symbols))]
+
+    def download_intraday(symbols, start=None, timeout=None):
+        end = pd.Timestamp(clock["now"]).tz_convert("UTC").floor("min")
+        index = pd.date_range(end=end, periods=60, freq="1min")
+        if start is not None:
+            index = index[index >= pd.Timestamp(start)]
+        last = wide["Close"].loc[wide.index < pd.Timestamp(clock["now"].date())].iloc[-1]
+        columns = {}
+        for symbol in symbols:
+            rng = np.random.default_rng(zlib.crc32(symbol.encode()) + end.minute)
+            closes = last[symbol] * (1 + np.cumsum(rng.normal(0, 0.0005, len(index))))
+            columns[("Close", symbol)] = closes
+        return pd.DataFrame(columns, index=index)
+
+    frozen = types.SimpleNamespace(**vars(datetime))
+
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock["now"].astimezone(tz) if tz else clock["now"].replace(tzinfo=None)
+
+    frozen.datetime = FrozenDatetime
+    market_text.datetime = frozen
+    # * גם time.time() של המטמונים (TTL, "נשלף אחרי הסגירה" של לוח המסחר) רץ על השעון המוקפא —
+    # התוצאות לא תלויות ביום שבו מריצים את הבנצ'מרק
+    frozen_time = types.SimpleNamespace(**vars(time))
+    frozen_time.time = lambda: clock["now"].timestamp()
+    for module in (market_text, bar_cache, snapshot_store):
+        module.time = frozen_time
+    market_data.download_bars = download_bars
+    market_data.get_stock_change = lambda ticker, timeout=None: market_data.EMPTY_QUOTE
+    intraday.download_intraday = download_intraday
+    audio.Communicate = LocalCommunicate
+    uploader.UPLOAD_URL = upload_url
+
+    jerusalem = pytz.timezone("Asia/Jerusalem")
+
+    def freeze(naive):
+        clock["now"] = jerusalem.localize(naive)
+        intraday._windows.clear()
+        intraday._prev_close.clear()
+        return clock["now"]
+
+    return freeze
+
+# === מדידה ===
+LAST_QUOTES_FILE = "last_quotes.json"
+
+def remove_cache(name):
+    path = os.path.join("cache", name)
+    if os.path.exists(path):
+        os.remove(path)
+
+def measure(results, stage, fn, iterations, unit_bytes=None):
+    latencies = []
+    total_bytes = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        out = fn()
+        latencies.append(time.perf_counter() - started)
+        if unit_bytes:
+            total_bytes += unit_bytes(out)
+    results[stage] = summarize(latencies, total_bytes)
+    return out
+
+def summarize(latencies, total_bytes=0):
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        "n": len(latencies),
+        "mean_ms": 1000 * total / len(latencies),
+        "p50_ms": 1000 * ordered[len(ordered) // 2],
+        "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "per_second": len(latencies) / total if total else float("inf"),
+        "mb_per_second": total_bytes / total / 1e6 if total and total_bytes else None,
+    }
+
+# * import main בתהליך חדש: זמן כולל מ־-X importtime, והמודולים הכבדים שנטענו
+def import_time(code="import main"):
+    probe = f"{code}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True,
+                         env={**os.environ, "PYTHONPATH": REPO_DIR}, check=True)
+    wall = time.perf_counter() - started
+    cumulative = {}
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative[parts[2].strip()] = int(parts[1]) / 1e6
+    heavy = [m for m in out.stdout.strip().split(",") if m]
+    return wall, cumulative.get("main", 0.0), heavy
+
+def measure_startup(results, iterations):
+    walls, imports = [], []
+    for _ in range(iterations):
+        wall, seconds, heavy = import_time()
+        walls.append(wall)
+        imports.append(seconds)
+    results["startup.process"] = summarize(walls)
+    results["startup.import_main"] = summarize(imports)
+    mean_ms = results["startup.import_main"]["mean_ms"]
+    status = "✅" if mean_ms <= STARTUP_BUDGET_MS else "❌"
+    print(f"{status} import main: {mean_ms:.0f}ms (תקציב {STARTUP_BUDGET_MS}ms); מודולים כבדים: {', '.join(heavy) or 'אין'}")
+
+    # * מסלול מהיר: נתונים טריים במטמון (מהשלבים הקודמים) — שליפה בלי pandas/yfinance.
+    # התהליך החדש רץ על השעון האמיתי, לכן הנתונים נשמרים מחדש עם הזמן האמיתי
+    from snapshot_store import load_last_quotes, save_last_quotes
+    save_last_quotes({symbol: quote for symbol, (quote, _) in load_last_quotes().items()}, now=time.time())
+    code = ("import asyncio, datetime, pytz, market_text as m; "
+            "asyncio.run(m.fetch_report_quotes(datetime.datetime.now(pytz.timezone('Asia/Jerusalem'))))")
+    wall, _, heavy = import_time(code)
+    results["startup.fast_path"] = summarize([wall])
+    print(f"{'✅' if not heavy else '❌'} מסלול מהיר: {wall * 1000:.0f}ms; מודולים כבדים: {', '.join(heavy) or 'אין'}")
+
+def print_table(results):
+    print(f"{'stage':<24}{'n':>5}{'mean ms':>11}{'p50 ms':>11}{'p95 ms':>11}{'ops/s':>10}{'MB/s':>9}")
+    for stage, r in results.items():
+        mb = f"{r['mb_per_second']:.1f}" if r.get("mb_per_second") else "-"
+        print(f"{stage:<24}{r['n']:>5}{r['mean_ms']:>11.2f}{r['p50_ms']:>11.2f}{r['p95_ms']:>11.2f}{r['per_second']:>10.1f}{mb:>9}")
+
+def run_benchmark(iterations=ITERATIONS, transcoder=None):
+    import audio
+    import market_text
+    import uploader
+
+    if transcoder:
+        audio.TRANSCODER = transcoder
+    symbols = all_symbols()
+    fixture, source = load_fixture(symbols)
+    server, url = start_upload_server()
+    freeze = install_stand_ins(fixture, url)
+    print(f"📦 {len(symbols)} סימבולים, נתונים: {source}; ממיר: {'native' if audio.use_native_transcoder() else 'ffmpeg'}")
+
+    results = {}
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    profiles = market_text.PROFILES
+
+    # * טקסט לכל הפרופילים, בכל ענף: cold — מטמונים ריקים (שליפה מההקלטה);
+    # warm — מטמון הנרות חם (והמנוע התוך־יומי בתוספות), בלי מטמון הנתונים האחרונים;
+    # fast_path — כל הנתונים טריים ב־last_quotes.json, בלי שליפה בכלל
+    cold, warm, fast = [], [], []
+    for branch, naive in BRANCHES.items():
+        freeze(naive)
+        for name in ("bars.sqlite", LAST_QUOTES_FILE):
+            remove_cache(name)
+        started = time.perf_counter()
+        reports = run(market_text.generate_profile_reports_async(profiles))
+        cold.append(time.perf_counter() - started)
+        for _ in range(iterations):
+            remove_cache(LAST_QUOTES_FILE)
+            started = time.perf_counter()
+            run(market_text.generate_profile_reports_async(profiles))
+            warm.append(time.perf_counter() - started)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run(market_text.generate_profile_reports_async(profiles))
+            fast.append(time.perf_counter() - started)
+    results["text.cold"] = summarize(cold)
+    results["text.warm"] = summarize(warm)
+    results["text.fast_path"] = summarize(fast)
+
+    now = freeze(BRANCHES["live"])
+    quotes = run(market_text.fetch_report_quotes(now, profiles))
+    measure(results, "render", lambda: market_text.render_profiles(now, quotes, profiles), iterations * 10)
+    texts = {name: text for name, (text, _) in reports.items()}
+
+    # * סינתזה: מטמון מקטעים ריק ואז חם
+    cold = []
+    for _ in range(max(1, iterations // 5)):
+        for name in os.listdir(audio.TTS_CACHE_DIR) if os.path.isdir(audio.TTS_CACHE_DIR) else []:
+            os.remove(os.path.join(audio.TTS_CACHE_DIR, name))
+        started = time.perf_counter()
+        wavs = run(audio.synthesize_reports_wav(texts))
+        cold.append(time.perf_counter() - started)
+    results["tts.cold"] = summarize(cold, sum(len(w) for w in wavs.values()) * len(cold))
+    measure(results, "tts.warm", lambda: run(audio.synthesize_reports_wav(texts)), iterations,
+            lambda out: sum(len(w) for w in out.values()))
+
+    # * המרה בלבד: MP3 של הדו״ח הראשי → PCM 8kHz
+    mp3 = speech_mp3(texts[market_text.DEFAULT_PROFILE])
+    if audio.use_native_transcoder():
+        measure(results, "transcode.native", lambda: audio.decode_mp3_to_pcm(mp3), iterations, lambda _: len(mp3))
+    with tempfile.TemporaryDirectory() as tmp:
+        mp3_path = os.path.join(tmp, "market.mp3")
+        with open(mp3_path, "wb") as f:
+            f.write(mp3)
+        wav_path = os.path.join(tmp, "market.wav")
+        if audio.use_native_transcoder() or os.path.exists(audio.FFMPEG_PATH):
+            measure(results, "transcode.file", lambda: audio.convert_to_wav(mp3_path, wav_path), iterations,
+                    lambda _: len(mp3))
+
+    # * העלאה לשרת המקומי
+    wav = wavs[market_text.DEFAULT_PROFILE]
+    measure(results, "upload", lambda: uploader.upload_to_targets(wav, ["ivr2:/1/"], "bench"), iterations,
+            lambda _: len(wav))
+    measure(results, "upload.fanout4", lambda: uploader.upload_to_targets(wav, [f"ivr2:/{i}/" for i in range(4)], "bench"),
+            iterations, lambda _: 4 * len(wav))
+
+    measure_startup(results, max(3, iterations // 4))
+
+    server.shutdown()
+    loop.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="בנצ'מרק לא מקוון לצינור תמונת השוק")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "record"])
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--transcoder", choices=["native", "ffmpeg"])
+    parser.add_argument("--json", help="כתיבת התוצאות לקובץ JSON")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_fixture()
+        return
+
+    # * כל המטמונים (נרות, TTS, מצב) בתיקייה זמנית — הריצה לא נוגעת במטמון האמיתי
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results = run_benchmark(args.iterations, args.transcoder)
+        finally:
+            os.chdir(cwd)
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
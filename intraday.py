@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+from tracing import span
+from yahoo_session import get_session
+from market_calendar import CRYPTO, TIMEZONES, exchange_for, session
+from market_data import download_closes, Quote, EMPTY_QUOTE, FETCH_TIMEOUT, REPORT_DEADLINE, TREND_UP, TREND_DOWN
+
+# === מנוע תוך־יומי: חלון נרות דקה בזיכרון, מתעדכן בתוספות בלבד ===
+# בזמן מסחר הנר היומי של Yahoo חלקי ומתעדכן באיחור; כאן נשמר לכל סימבול חלון נרות
+# של הסשן הנוכחי, ובכל מחזור יורדים רק הנרות שנוספו מאז הנר האחרון שבחלון.
+INTRADAY_INTERVAL = "1m"
+INTRADAY_PERIOD = "1d"      # טעינה ראשונה — הסשן האחרון
+INTRADAY_WINDOW = 120       # נרות לסימבול בזיכרון
+MOMENTUM_BARS = 15          # מומנטום: המחיר מול לפני 15 נרות
+SESSION_GAP = pd.Timedelta(minutes=30)  # פער גדול מזה בין נרות = סשן חדש
+
+_windows = {}      # סימבול → Series של מחירי סגירה (אינדקס UTC)
+_prev_close = {}   # סימבול → (יום הסשן, סגירה קודמת)
+
+# * הורדה מרוכזת של נרות דקה — מלאה, או מרגע נתון ואילך
+def download_intraday(symbols, start=None, timeout=FETCH_TIMEOUT):
+    window = {"period": INTRADAY_PERIOD} if start is None else {"start": start}
+    return yf.download(
+        list(symbols),
+        interval=INTRADAY_INTERVAL,
+        group_by="column",
+        auto_adjust=True,
+        prepost=False,
+        threads=True,
+        progress=False,
+        multi_level_index=True,
+        timeout=timeout,
+        session=get_session(),
+        **window,
+    )
+
+def _closes_for(frame, symbol):
+    try:
+        closes = frame.xs(symbol, axis=1, level=1)["Close"].dropna()
+    except KeyError:
+        return None
+    if closes.empty:
+        return None
+    index = pd.DatetimeIndex(closes.index)
+    closes.index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    return closes.astype("float64")
+
+# * הוספת נרות לחלון: הנר האחרון מוחלף (דקה חלקית), פער גדול פותח סשן חדש
+def append_bars(symbol, closes):
+    window = _windows.get(symbol)
+    if window is not None and not window.empty and closes.index[0] - window.index[-1] <= SESSION_GAP:
+        window = pd.concat([window[window.index < closes.index[0]], closes])
+    else:
+        window = closes
+        _prev_close.pop(symbol, None)
+    _windows[symbol] = window.iloc[-INTRADAY_WINDOW:]
+
+# * תחילת הסשן של היום לסימבול: נרות מלפניה שייכים לסשן קודם (period="1d" מיד אחרי
+# הפתיחה עוד מחזיר את הסשן של אתמול). אין מסחר היום — now, כלומר אין נר תקף.
+def session_start(symbol, now):
+    exchange = exchange_for(symbol)
+    if exchange == CRYPTO:
+        return None
+    hours = session(exchange, now.astimezone(TIMEZONES[exchange]).date())
+    return pd.Timestamp(hours[0] if hours else now).tz_convert("UTC")
+
+# * עדכון החלונות: טעינה מלאה לסימבולים חדשים, תוספת בלבד לקיימים;
+# חלון של סשן קודם נזרק, ונרות מלפני פתיחת הסשן של היום לא נכנסים
+def update_windows(symbols, timeout=FETCH_TIMEOUT, now=None):
+    now = datetime.datetime.now(datetime.timezone.utc) if now is None else now
+    symbols = list(dict.fromkeys(symbols))
+    starts = {symbol: session_start(symbol, now) for symbol in symbols}
+    for symbol in symbols:
+        window = _windows.get(symbol)
+        if window is not None and starts[symbol] is not None and window.index[-1] < starts[symbol]:
+            del _windows[symbol]
+            _prev_close.pop(symbol, None)
+    new = [s for s in symbols if s not in _windows]
+    known = [s for s in symbols if s in _windows]
+    batches = []
+    if new:
+        batches.append((new, None))
+    if known:
+        batches.append((known, min(_windows[s].index[-1] for s in known)))
+
+    for group, start in batches:
+        try:
+            with span("fetch.intraday", symbols=len(group), incremental=start is not None) as attrs:
+                frame = download_intraday(group, start=start, timeout=timeout)
+                attrs["bars"] = 0 if frame is None else len(frame)
+        except Exception:
+            continue
+        if frame is None or frame.empty:
+            continue
+        for symbol in group:
+            closes = _closes_for(frame, symbol)
+            if closes is not None and starts[symbol] is not None:
+                closes = closes[closes.index >= starts[symbol]]
+            if closes is not None and not closes.empty:
+                append_bars(symbol, closes)
+
+    _load_prev_closes([s for s in symbols if s in _windows and s not in _prev_close], timeout)
+
+# * סגירה קודמת — מהנרות היומיים (מטמון), פעם אחת לסשן
+def _load_prev_closes(symbols, timeout=FETCH_TIMEOUT):
+    if not symbols:
+        return
+    daily = download_closes(symbols, timeout=timeout)
+    for symbol in symbols:
+        session_day = _windows[symbol].index[0].tz_localize(None).normalize()
+        if symbol not in daily.columns:
+            continue
+        closes = daily[symbol].dropna()
+        closes = closes[closes.index < session_day]
+        if not closes.empty:
+            _prev_close[symbol] = (session_day, float(closes.iloc[-1]))
+
+# * Quote מהחלון: שינוי מול הסגירה הקודמת, טרנד לפי כיוון היום + מומנטום
+def intraday_quote(symbol):
+    window = _windows.get(symbol)
+    if window is None or window.empty:
+        return EMPTY_QUOTE
+    current = float(window.iloc[-1])
+    if symbol not in _prev_close:
+        return Quote(None, round(current, 2), None)
+    prev = _prev_close[symbol][1]
+    pct = ((current - prev) / prev) * 100 if prev != 0 else 0.0
+
+    trend = None
+    if len(window) > MOMENTUM_BARS:
+        momentum = current - float(window.iloc[-MOMENTUM_BARS - 1])
+        if pct > 0 and momentum > 0:
+            trend = TREND_UP
+        elif pct < 0 and momentum < 0:
+            trend = TREND_DOWN
+    return Quote(round(pct, 2), round(current, 2), trend)
+
+# * סימבול בלי נרות מהסשן של היום — EMPTY_QUOTE, והמתקשר משלים מהנתונים היומיים
+def fetch_intraday_quotes(symbols, timeout=FETCH_TIMEOUT, now=None):
+    update_windows(symbols, timeout=timeout, now=now)
+    return {symbol: intraday_quote(symbol) for symbol in dict.fromkeys(symbols)}
+
+# * אסינכרוני, עם deadline — מה שלא הגיע נשאר EMPTY_QUOTE (והמתקשר משלים מהנתונים היומיים)
+async def fetch_intraday_quotes_async(symbols, timeout=FETCH_TIMEOUT, deadline=REPORT_DEADLINE, now=None):
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    # * executor משלו, שנסגר בלי לחכות — thread תקוע לא מעכב את סגירת הלולאה (asyncio.run)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(executor, fetch_intraday_quotes, symbols, timeout, now), deadline)
+    except Exception:
+        return {symbol: EMPTY_QUOTE for symbol in symbols}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,81 +1,204 @@
+import argparse
 import asyncio
-import os
-import subprocess
-import urllib.request
-import tarfile
+import time
 import warnings
-from edge_tts import Communicate
-from requests_toolbelt.multipart.encoder import MultipartEncoder
-import requests
-from market_text import generate_market_text  # קובץ משני שמחזיר טקסט
+import tracing
+from market_text import generate_profile_reports_async, PROFILES, PROFILE_TARGETS, DEFAULT_PROFILE  # קובץ משני שמחזיר טקסט
+from snapshot_store import is_unchanged, save_last_upload, save_last_good, load_last_good
+from scheduler import run_forever, DAEMON_INTERVAL_MINUTES
 
 warnings.filterwarnings("ignore")
+# * audio (edge_tts/aiohttp) ו־uploader (requests) נטענים רק כשיש מה לסנתז/להעלות —
+# ריצה שמסתיימת ב"לא השתנה" לא משלמת עליהם
 
 # === פרטי התחברות לימות המשיח ===
 USERNAME = "0733181201"
 PASSWORD = "6714453"
 TOKEN = f"{USERNAME}:{PASSWORD}"
 TARGET_PATH = "ivr2:/2/"  # שנה לשלוחה שברצונך להעלות אליה
-FFMPEG_PATH = "./bin/ffmpeg"
-
-# === מבטיח ש־ffmpeg מותקן ===
-def ensure_ffmpeg():
-    if not os.path.exists(FFMPEG_PATH):
-        print("⬇️ מוריד ffmpeg...")
-        os.makedirs("bin", exist_ok=True)
-        url = "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz"
-        archive_path = "bin/ffmpeg.tar.xz"
-        extract_path = "bin"
-        urllib.request.urlretrieve(url, archive_path)
-        with tarfile.open(archive_path) as tar:
-            tar.extractall(path=extract_path)
-        for root, dirs, files in os.walk(extract_path):
-            for file in files:
-                if file == "ffmpeg":
-                    os.rename(os.path.join(root, file), FFMPEG_PATH)
-                    os.chmod(FFMPEG_PATH, 0o755)
-                    break
-
-# === ממיר טקסט ל־MP3 ===
-async def text_to_speech(text, filename):
-    communicate = Communicate(text, voice="he-IL-AvriNeural")
-    await communicate.save(filename)
-
-# === ממיר מ־MP3 ל־WAV בפורמט של ימות המשיח ===
-def convert_to_wav(mp3_file, wav_file):
-    ensure_ffmpeg()
-    with open(os.devnull, 'w') as devnull:
-        subprocess.run(
-            [FFMPEG_PATH, "-y", "-i", mp3_file, "-ar", "8000", "-ac", "1", "-acodec", "pcm_s16le", wav_file],
-            stdout=devnull,
-            stderr=devnull
-        )
-
-# === מעלה לימות המשיח ===
-def upload_to_yemot(wav_file, path):
-    m = MultipartEncoder(fields={
-        'token': TOKEN,
-        'path': path + "001.wav",
-        'file': ("001.wav", open(wav_file, 'rb'), 'audio/wav')
-    })
-    r = requests.post("https://www.call2all.co.il/ym/api/UploadFile", data=m, headers={'Content-Type': m.content_type})
-    if r.ok:
-        print("✅ הועלה בהצלחה")
-    else:
-        print("❌ שגיאה בהעלאה:", r.text)
+TARGET_PATHS = [TARGET_PATH]  # אותה תמונת שוק לכמה שלוחות — הוסף כאן
+STREAMING_TTS = True  # True: סינתזה לפי מקטעים, בזיכרון ועם מטמון; False: market.mp3 → market.wav על הדיסק
+UNCHANGED_MAX_AGE = 60 * 60  # נתונים זהים להעלאה האחרונה — מדלגים, אבל לא יותר משעה (שורת השעה מתיישנת)
+TEXT_BUDGET = 60   # שניות לשליפה + טקסט; אחריהן מגישים את ה־WAV הטוב האחרון
+AUDIO_BUDGET = 45  # שניות לסינתזה; אחריהן מגישים את ה־WAV הטוב האחרון והסינתזה ממשיכה ברקע
+METRICS_PATH = None  # נתיב לקובץ מדדי Prometheus (textfile collector); נקבע ב־--metrics
+
+# === מעלה לימות המשיח — לכל השלוחות במקביל ===
+def upload_to_yemot(wav, paths):
+    """wav: נתיב לקובץ או bytes של WAV מוכן; paths: רשימת שלוחות."""
+    from uploader import upload_to_targets
+    if not isinstance(wav, (bytes, bytearray)):
+        with open(wav, 'rb') as f:
+            wav = f.read()
+    results = upload_to_targets(wav, paths, TOKEN)
+    for result in results:
+        if result["ok"]:
+            print(f"✅ הועלה בהצלחה ל־{result['path']} ({result['seconds']:.2f}s, ניסיונות: {result['attempts']})")
+        else:
+            print(f"❌ שגיאה בהעלאה ל־{result['path']} ({result['seconds']:.2f}s, ניסיונות: {result['attempts']}):", result["error"])
+    return bool(results) and all(result["ok"] for result in results)
+
+# === שמע: סינתזה בתקציב זמן, ונפילה ל־WAV הטוב האחרון ===
+_background = set()  # סינתזות שחרגו מהתקציב וממשיכות ברקע
+
+async def synthesize_texts(texts):
+    """texts: {פרופיל: טקסט} → {פרופיל: bytes של WAV}."""
+    from audio import text_to_speech, convert_to_wav, synthesize_reports_wav
+    if STREAMING_TTS:
+        return await synthesize_reports_wav(texts)
+    wavs = {}
+    for name, text in texts.items():
+        await text_to_speech(text, "market.mp3")
+        convert_to_wav("market.mp3", "market.wav")
+        with open("market.wav", "rb") as f:
+            wavs[name] = f.read()
+    return wavs
+
+# * ה־WAV הטוב האחרון לכל פרופיל — רק אם הוא עוד לא הועלה (אחרת השלוחה כבר מחזיקה אותו)
+def last_good_wavs(names):
+    wavs = {}
+    for name in names:
+        last = load_last_good(name)
+        if last and not is_unchanged(last["fingerprint"], float("inf"), profile=name):
+            print(f"♻️ {name}: מגיש את השמע הטוב האחרון")
+            wavs[name] = (last["fingerprint"], last["wav"])
+    return wavs
+
+# * העלאה לשלוחות הפרופילים במקביל (threads); טביעות האצבע נשמרות אחר כך, בלולאה עצמה —
+# כך ששמירות של כמה פרופילים לא רצות זו על זו
+async def publish_all(wavs):
+    """wavs: {פרופיל: (טביעת אצבע, WAV)}."""
+    names = list(wavs)
+    results = await asyncio.gather(
+        *(asyncio.to_thread(upload_to_yemot, wavs[name][1], get_profile_targets(name)) for name in names),
+        return_exceptions=True,
+    )
+    for name, ok in zip(names, results):
+        if isinstance(ok, Exception):
+            print(f"❌ {name}: העלאה נכשלה:", ok)
+        elif ok:
+            save_last_upload(wavs[name][0], profile=name)
+
+def _store_fresh(reports, wavs):
+    fresh = {}
+    for name, wav in wavs.items():
+        text, fingerprint = reports[name]
+        save_last_good(name, text, fingerprint, wav)
+        fresh[name] = (fingerprint, wav)
+    return fresh
+
+# * סינתזה שחרגה מהתקציב: כשתסתיים — נשמרת ומועלית (stale-while-revalidate)
+async def _revalidate(task, reports):
+    try:
+        wavs = await task
+    except Exception as e:
+        print("❌ סינתזה ברקע נכשלה:", e)
+        return
+    print("🔄 סינתזה ברקע הסתיימה — מעלה את הגרסה העדכנית")
+    await publish_all(_store_fresh(reports, wavs))
+
+async def produce_audio(reports):
+    """reports: {פרופיל: (טקסט, טביעת אצבע)}. מחזיר {פרופיל: (טביעת אצבע, WAV)} להעלאה עכשיו."""
+    task = asyncio.create_task(synthesize_texts({name: text for name, (text, _) in reports.items()}))
+    try:
+        wavs = await asyncio.wait_for(asyncio.shield(task), AUDIO_BUDGET)
+    except Exception as e:
+        if task.done():
+            print("❌ סינתזה נכשלה:", e)
+        else:
+            print(f"⏳ הסינתזה חרגה מ־{AUDIO_BUDGET} שניות — ממשיכה ברקע")
+            background = asyncio.create_task(_revalidate(task, reports))
+            _background.add(background)
+            background.add_done_callback(_background.discard)
+        return last_good_wavs(reports)
+    return _store_fresh(reports, wavs)
+
+# * שלוחות היעד של פרופיל: מ־watchlist.json, ולפרופיל הראשי ברירת המחדל היא TARGET_PATHS
+def get_profile_targets(name):
+    targets = PROFILE_TARGETS.get(name)
+    if targets is None:
+        return TARGET_PATHS if name == DEFAULT_PROFILE else []
+    return targets
+
+# === מחזור אחד לפרופילים הנתונים: שליפה אחת → טקסט → שמע → העלאה; מחזיר זמני שלבים ===
+async def run_profiles(profiles):
+    """כל מחזור נמדד (tracing): סיכום JSON ב־cache/last_run.json, ובמצב שירות — גם מדדי Prometheus."""
+    tracing.start_run()
+    timings = {}
+    try:
+        timings = await _run_profiles(profiles)
+        return timings
+    finally:
+        for stage, seconds in timings.items():
+            tracing.record(f"stage.{stage}", seconds)
+        summary = tracing.finish_run(profiles=list(profiles))
+        if METRICS_PATH:
+            tracing.write_metrics(METRICS_PATH)
+        slowest = ", ".join(f"{s['name']}={s['seconds']:.2f}s" for s in summary["slowest"][:3])
+        print(f"🔎 {summary['seconds']:.2f}s; האיטיים: {slowest}")
+
+async def _run_profiles(profiles):
+    timings = {}
+    uploads = {}
+    started = time.perf_counter()
+    print(f"📊 מייצר טקסט תמונת שוק ({', '.join(profiles)})...")
+    try:
+        reports = await asyncio.wait_for(generate_profile_reports_async(profiles), TEXT_BUDGET)
+    except Exception as e:
+        print("❌ יצירת הטקסט נכשלה:", e)
+        reports = {}
+        uploads = last_good_wavs(profiles)
+    timings["text"] = time.perf_counter() - started
+
+    changed = {}
+    for name, (text, fingerprint) in reports.items():
+        if not text:
+            print(f"⚠️ לא נוצר טקסט ({name})")
+        elif is_unchanged(fingerprint, UNCHANGED_MAX_AGE, profile=name):
+            print(f"⏭️ {name}: הנתונים לא השתנו מאז ההעלאה האחרונה — מדלג")
+        else:
+            print(f"📝 הטקסט ({name}):\n", text)
+            changed[name] = (text, fingerprint)
+
+    if reports:
+        if not changed:
+            return timings
+        started = time.perf_counter()
+        uploads = await produce_audio(changed)
+        timings["audio"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await publish_all(uploads)
+    timings["upload"] = time.perf_counter() - started
+    return timings
+
+# * תמונת השוק הראשית בלבד
+async def run_once():
+    return await run_profiles({DEFAULT_PROFILE: PROFILES[DEFAULT_PROFILE]})
+
+# * כל הפרופילים שהוגדרו להם שלוחות: שליפה אחת, מקטעי שמע משותפים, העלאות במקביל
+async def run_batch():
+    return await run_profiles({name: sections for name, sections in PROFILES.items() if get_profile_targets(name)})
 
 # === פונקציית הרצה ראשית ===
 async def main():
-    print("📊 מייצר טקסט תמונת שוק...")
-    text = generate_market_text()
-    if not text:
-        print("⚠️ לא נוצר טקסט")
-        return
+    parser = argparse.ArgumentParser(description="תמונת שוק לימות המשיח")
+    parser.add_argument("--daemon", action="store_true", help="הרצה רציפה לפי לוח זמנים במקום ריצה בודדת")
+    parser.add_argument("--interval", type=int, default=DAEMON_INTERVAL_MINUTES, help="דקות בין מחזורים במצב שירות")
+    parser.add_argument("--batch", action="store_true", help="כל הפרופילים שהוגדרו להם שלוחות, בשליפה אחת")
+    parser.add_argument("--metrics", nargs="?", const=tracing.METRICS_PATH, help="כתיבת מדדי Prometheus לקובץ אחרי כל מחזור")
+    args = parser.parse_args()
 
-    print("📝 הטקסט:\n", text)
-    await text_to_speech(text, "market.mp3")
-    convert_to_wav("market.mp3", "market.wav")
-    upload_to_yemot("market.wav", TARGET_PATH)
+    global METRICS_PATH
+    METRICS_PATH = args.metrics
+
+    cycle = run_batch if args.batch else run_once
+    if args.daemon:
+        await run_forever(cycle, interval_minutes=args.interval)
+    else:
+        await cycle()
+        # * ריצה בודדת: ממתינים לסינתזה שהמשיכה ברקע, כדי שהגרסה העדכנית תועלה
+        await asyncio.gather(*_background)
 
 if __name__ == "__main__":
     asyncio.run(main())
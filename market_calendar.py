@@ -0,0 +1,266 @@
+import datetime
+from collections import namedtuple
+from functools import lru_cache
+import pytz
+
+# === לוח המסחר של הבורסות: ימי מסחר, חגים, ימים מקוצרים ושעון קיץ ===
+# לכל בורסה נבנית פעם אחת טבלת סשנים (פתיחה/סגירה, באזור הזמן המקומי שלה — כך ששעון הקיץ
+# של ניו־יורק ושל ירושלים לא מתערבבים) ונשמרת בזיכרון; "פתוח עכשיו?", "הפתיחה הבאה"
+# ו"הסגירה האחרונה" הן חיפוש במילון לפי תאריך ועוד צעד או שניים בטבלה.
+TASE = "TASE"
+NYSE = "NYSE"        # גם נאסד״ק — אותם ימים ואותן שעות
+CME = "CME"          # חוזים עתידיים (זהב, נפט): ראשון בערב עד שישי, הפסקה יומית של שעה
+FX = "FX"            # מט״ח: 24/5, מראשון 17:00 עד שישי 17:00 (ניו־יורק)
+CRYPTO = "CRYPTO"    # 24/7 — תמיד פתוח
+
+JERUSALEM = pytz.timezone("Asia/Jerusalem")
+NEW_YORK = pytz.timezone("America/New_York")
+TIMEZONES = {TASE: JERUSALEM, NYSE: NEW_YORK, CME: NEW_YORK, FX: NEW_YORK}
+
+# * תל אביב: מעבר לשבוע מסחר שני–שישי; לפניו ראשון–חמישי
+TASE_MON_FRI_FROM = datetime.date(2026, 1, 5)
+TASE_OPEN = datetime.time(9, 59)
+TASE_CLOSE = datetime.time(17, 25)
+TASE_SHORT_CLOSE = datetime.time(13, 50)    # יום שישי מקוצר
+TASE_SUNDAY_CLOSE = datetime.time(15, 40)   # יום ראשון מקוצר — לפני המעבר
+# חגים לפי הלוח העברי: (עוגן, היסט בימים) — עוגן "pesach" = ט״ו בניסן, "rosh_hashana" = א׳ בתשרי
+TASE_HOLIDAYS = [
+    ("pesach", -1), ("pesach", 0),                              # ערב פסח, פסח
+    ("pesach", 6),                                              # שביעי של פסח
+    ("pesach", 50),                                             # שבועות
+    ("rosh_hashana", -1), ("rosh_hashana", 0), ("rosh_hashana", 1),
+    ("rosh_hashana", 8), ("rosh_hashana", 9),                   # ערב יום כיפור, יום כיפור
+    ("rosh_hashana", 13), ("rosh_hashana", 14),                 # ערב סוכות, סוכות
+    ("rosh_hashana", 20), ("rosh_hashana", 21),                 # ערב שמחת תורה, שמחת תורה
+]
+TASE_EXTRA_CLOSED = set()   # סגירות חד־פעמיות (יום בחירות וכו') — datetime.date
+
+# * ארה״ב: בורסת ניו־יורק/נאסד״ק, CME ומט״ח (שעון ניו־יורק)
+NYSE_OPEN = datetime.time(9, 30)
+NYSE_CLOSE = datetime.time(16, 0)
+NYSE_EARLY_CLOSE = datetime.time(13, 0)     # ערב 4 ביולי, יום אחרי חג ההודיה, ערב חג המולד
+NYSE_EXTRA_CLOSED = set()   # סגירות חד־פעמיות (יום אבל לאומי וכו') — datetime.date; חל גם על CME
+CME_OPEN = datetime.time(18, 0)             # ביום המסחר הקודם
+CME_CLOSE = datetime.time(17, 0)
+FX_ROLL = datetime.time(17, 0)
+
+SETTLE_DELAY = datetime.timedelta(minutes=30)   # אחרי הסגירה הנר היומי עוד מתעדכן
+CALENDAR_SPAN_YEARS = 1                         # טבלה לשנה נתונה מכסה גם שנה לפניה ושנה אחריה
+
+Session = namedtuple("Session", ["day", "open", "close"])
+
+# * שיוך סימבול לבורסה לפי הסיומת של Yahoo
+def exchange_for(symbol):
+    if symbol.endswith(".TA"):
+        return TASE
+    if symbol.endswith("=F"):
+        return CME
+    if symbol.endswith("=X"):
+        return FX
+    if symbol.endswith("-USD"):
+        return CRYPTO
+    return NYSE
+
+# === לוח עברי (חישוב המולד) ===
+def _hebrew_leap(year):
+    return (7 * year + 1) % 19 < 7
+
+# * ימים מתחילת הלוח העברי עד א׳ בתשרי של השנה (כולל דחיות)
+def _hebrew_elapsed_days(year):
+    months = 235 * ((year - 1) // 19) + 12 * ((year - 1) % 19) + (7 * ((year - 1) % 19) + 1) // 19
+    parts = 204 + 793 * (months % 1080)
+    hours = 5 + 12 * months + 793 * (months // 1080) + parts // 1080
+    day = 1 + 29 * months + hours // 24
+    parts = 1080 * (hours % 24) + parts % 1080
+    if (parts >= 19440
+            or (day % 7 == 2 and parts >= 9924 and not _hebrew_leap(year))
+            or (day % 7 == 1 and parts >= 16789 and _hebrew_leap(year - 1))):
+        day += 1
+    if day % 7 in (0, 3, 5):
+        day += 1
+    return day
+
+_HEBREW_EPOCH = -1373428  # ordinal של ימי הלוח העברי (date.toordinal)
+
+def rosh_hashana(year):
+    """א׳ בתשרי שחל בסתיו של השנה הלועזית year."""
+    return datetime.date.fromordinal(_HEBREW_EPOCH + _hebrew_elapsed_days(year + 3761))
+
+def pesach(year):
+    """ט״ו בניסן של השנה הלועזית year — תמיד 163 יום לפני ראש השנה שאחריו."""
+    return rosh_hashana(year) - datetime.timedelta(days=163)
+
+# * יום העצמאות: ה׳ באייר, מוקדם/נדחה כשחל בשישי, בשבת או בשני
+def independence_day(year):
+    day = pesach(year) + datetime.timedelta(days=20)
+    return day + datetime.timedelta(days={4: -1, 5: -2, 0: 1}.get(day.weekday(), 0))
+
+@lru_cache(maxsize=None)
+def tase_holidays(year):
+    anchors = {"pesach": pesach(year), "rosh_hashana": rosh_hashana(year)}
+    days = {anchors[anchor] + datetime.timedelta(days=offset) for anchor, offset in TASE_HOLIDAYS}
+    days.add(independence_day(year))
+    return frozenset(days | {d for d in TASE_EXTRA_CLOSED if d.year == year})
+
+# === חגים בארה״ב ===
+def _easter(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return datetime.date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _nth_weekday(year, month, weekday, n):
+    """n-י ביום weekday בחודש (n=-1 — האחרון)."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+# * חג שחל בשבת — נחגג בשישי, בראשון — בשני
+def _observed(day):
+    return day + datetime.timedelta(days={5: -1, 6: 1}.get(day.weekday(), 0))
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year):
+    days = {
+        _nth_weekday(year, 1, 0, 3),                        # מרטין לותר קינג
+        _nth_weekday(year, 2, 0, 3),                        # יום הנשיאים
+        _easter(year) - datetime.timedelta(days=2),         # יום שישי הטוב
+        _nth_weekday(year, 5, 0, -1),                       # יום הזיכרון
+        _observed(datetime.date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),                        # יום העבודה
+        _nth_weekday(year, 11, 3, 4),                       # חג ההודיה
+        _observed(datetime.date(year, 12, 25)),
+    }
+    if year >= 2022:
+        days.add(_observed(datetime.date(year, 6, 19)))     # ג׳ונטינת׳
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:                             # שבת — לא נחגג בשישי שלפניו
+        days.add(_observed(new_year))
+    return frozenset(days | {d for d in NYSE_EXTRA_CLOSED if d.year == year})
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year):
+    days = {_nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1)}
+    july_3 = datetime.date(year, 7, 3)
+    if july_3.weekday() < 4:
+        days.add(july_3)
+    christmas_eve = datetime.date(year, 12, 24)
+    if christmas_eve.weekday() < 4:
+        days.add(christmas_eve)
+    return frozenset(days)
+
+# === טבלת הסשנים ===
+def _at(tz, day, time):
+    return tz.localize(datetime.datetime.combine(day, time))
+
+# * הסשן של יום מסחר בודד (None — הבורסה סגורה ביום הזה)
+def _trading_session(exchange, day):
+    tz = TIMEZONES[exchange]
+    weekday = day.weekday()
+    if exchange == TASE:
+        if day >= TASE_MON_FRI_FROM:
+            if weekday > 4:
+                return None
+            close = TASE_SHORT_CLOSE if weekday == 4 else TASE_CLOSE
+        else:
+            if weekday in (4, 5):
+                return None
+            close = TASE_SUNDAY_CLOSE if weekday == 6 else TASE_CLOSE
+        if day in tase_holidays(day.year):
+            return None
+        return _at(tz, day, TASE_OPEN), _at(tz, day, close)
+
+    if weekday > 4:
+        return None
+    if exchange == FX:
+        if (day.month, day.day) in ((1, 1), (12, 25)):
+            return None
+        return _at(tz, day - datetime.timedelta(days=1), FX_ROLL), _at(tz, day, FX_ROLL)
+    if day in nyse_holidays(day.year):
+        return None
+    early = day in nyse_early_closes(day.year)
+    if exchange == CME:
+        return (_at(tz, day - datetime.timedelta(days=1), CME_OPEN),
+                _at(tz, day, NYSE_EARLY_CLOSE if early else CME_CLOSE))
+    return _at(tz, day, NYSE_OPEN), _at(tz, day, NYSE_EARLY_CLOSE if early else NYSE_CLOSE)
+
+# * טבלה מחושבת מראש: סשנים ממוינים + לכל תאריך — האינדקס של הסשן הראשון מהתאריך ואילך
+# (נבנית פעם אחת לבורסה ולשנה)
+@lru_cache(maxsize=32)
+def _calendar(exchange, year):
+    first = datetime.date(year - CALENDAR_SPAN_YEARS, 1, 1)
+    last = datetime.date(year + CALENDAR_SPAN_YEARS, 12, 31)
+    sessions = []
+    by_day = {}
+    pending = []
+    day = first
+    while day <= last:
+        pending.append(day)
+        session = _trading_session(exchange, day)
+        if session is not None:
+            by_day.update((d, len(sessions)) for d in pending)
+            pending = []
+            sessions.append(Session(day, *session))
+        day += datetime.timedelta(days=1)
+    by_day.update((d, len(sessions)) for d in pending)
+    return sessions, by_day
+
+# * מספר הסשנים שנפתחו עד הרגע when (כולל) — sessions[k-1] הוא האחרון שנפתח.
+# סשן נפתח לכל המוקדם ערב לפני יום המסחר שלו, כך שמהאינדקס של התאריך זה צעד או שניים.
+def _locate(exchange, when):
+    sessions, by_day = _calendar(exchange, when.year)
+    k = max(by_day[when.astimezone(TIMEZONES[exchange]).date()] - 1, 0)
+    while k < len(sessions) and sessions[k].open <= when:
+        k += 1
+    return sessions, k
+
+# * זמן בלי אזור זמן — שעון ישראל (כמו בשאר הדו״ח)
+def localize(when):
+    return JERUSALEM.localize(when) if when.tzinfo is None else when
+
+def session(exchange, day):
+    """(פתיחה, סגירה) של יום המסחר day באזור הזמן של הבורסה; None — אין מסחר ביום הזה."""
+    sessions, by_day = _calendar(exchange, day.year)
+    index = by_day[day]
+    return sessions[index][1:] if index < len(sessions) and sessions[index].day == day else None
+
+def is_open(exchange, when):
+    if exchange == CRYPTO:
+        return True
+    when = localize(when)
+    sessions, k = _locate(exchange, when)
+    return k > 0 and when < sessions[k - 1].close
+
+def next_open(exchange, when):
+    if exchange == CRYPTO:
+        return localize(when)
+    sessions, k = _locate(exchange, localize(when))
+    return sessions[k].open
+
+def last_close(exchange, when):
+    """הסגירה האחרונה עד when (כולל); באמצע סשן — הסגירה של הסשן הקודם."""
+    if exchange == CRYPTO:
+        return localize(when)
+    when = localize(when)
+    sessions, k = _locate(exchange, when)
+    if k > 0 and sessions[k - 1].close <= when:
+        return sessions[k - 1].close
+    return sessions[k - 2].close
+
+# * נתון שנשלף אחרי הסגירה האחרונה (+ SETTLE_DELAY) והבורסה לא נפתחה מאז — אין מה לרענן
+def is_settled(symbol, fetched_at, now):
+    """fetched_at, now — שניות epoch (כמו time.time())."""
+    exchange = exchange_for(symbol)
+    if exchange == CRYPTO:
+        return False
+    when = datetime.datetime.fromtimestamp(now, pytz.utc)
+    if is_open(exchange, when):
+        return False
+    return fetched_at >= (last_close(exchange, when) + SETTLE_DELAY).timestamp()
@@ -0,0 +1,210 @@
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import bar_cache
+from market_calendar import is_settled
+from yahoo_session import get_session
+from tracing import span, cache_result
+
+# * yfinance / pandas / numpy נטענים בתוך הפונקציות שצריכות אותם (ייבוא עצל):
+# ריצה שכל הנתונים שלה טריים במטמון לא משלמת על טעינתם
+
+# === שכבת נתונים: שליפה מרוכזת של מחירים ===
+HISTORY_PERIOD = "1y"
+HISTORY_INTERVAL = "1d"
+HISTORY_BARS = 260      # נרות לכל סימבול בחישוב מתוך המטמון (שנה — לשיא השנתי ולתנודתיות)
+
+# === מנוע שליפה מקבילי ===
+FETCH_CONCURRENCY = 4   # מספר בקשות במקביל
+FETCH_CHUNK_SIZE = 6    # סימבולים להורדה מרוכזת אחת
+FETCH_TIMEOUT = 10      # שניות לבקשה (טיקר/חבילה)
+REPORT_DEADLINE = 25    # שניות לכל השליפה — אחריהן ממשיכים עם מה שיש
+
+TREND_UP = "מַמְשִׁיךְ לַעֲלוֹת"
+TREND_DOWN = "מַמְשִׁיךְ לְרֵדֶת"
+
+# * נתוני מכשיר: pct, price, trend כמו תמיד; sharp — האם השינוי חד ביחס לתנודתיות
+# (None — אין מספיק היסטוריה, והסף הקבוע של המכשיר קובע); near_high — סמוך לשיא השנתי;
+# age — דקות, כשהנתון הושלם מהמצב הטוב האחרון (None — נתון טרי)
+Quote = namedtuple("Quote", ["pct", "price", "trend", "sharp", "near_high", "age"], defaults=(None, None, None))
+EMPTY_QUOTE = Quote(None, None, None)
+
+# * שינוי/רמה/טרנד לטיקר
+def get_stock_change(ticker, timeout=FETCH_TIMEOUT):
+    import yfinance as yf
+    stock = yf.Ticker(ticker, session=get_session())
+    try:
+        with span("fetch.ticker", symbol=ticker):
+            hist = stock.history(period=HISTORY_PERIOD, interval=HISTORY_INTERVAL, timeout=timeout)
+    except Exception:
+        return EMPTY_QUOTE
+    if hist is None or hist.empty or "Close" not in hist.columns:
+        return EMPTY_QUOTE
+    # * אותו חישוב כמו בהורדה המרוכזת — השנה כולה, כך שגם לגיבוי יש sharp / near_high
+    return compute_quotes(hist[["Close"]].set_axis([ticker], axis=1))[ticker]
+
+# * הורדה מרוכזת של נרות (OHLCV) — כל הסימבולים בקריאה אחת
+def download_bars(symbols, start=None, timeout=FETCH_TIMEOUT):
+    """start=None — תקופה מלאה (HISTORY_PERIOD); אחרת — מתאריך זה ואילך, כולל."""
+    import yfinance as yf
+    window = {"period": HISTORY_PERIOD} if start is None else {"start": start}
+    return yf.download(
+        list(symbols),
+        interval=HISTORY_INTERVAL,
+        group_by="column",
+        auto_adjust=True,
+        threads=True,
+        progress=False,
+        multi_level_index=True,
+        timeout=timeout,
+        session=get_session(),
+        **window,
+    )
+
+# * הורדה אחת של קבוצה, מדודה ב־span; כשל או תוצאה ריקה — None
+def _fetch_bars(group, start, timeout, **attrs):
+    try:
+        with span("fetch.bulk", symbols=len(group), full=start is None, **attrs) as span_attrs:
+            frame = download_bars(group, start=start, timeout=timeout)
+            span_attrs["bars"] = 0 if frame is None else len(frame)
+    except Exception:
+        return None
+    return None if frame is None or frame.empty else frame
+
+# * מטריצת Close רחבה (תאריכים × סימבולים): מטמון + השלמה של הנרות החדשים בלבד;
+# סימבול שהבורסה שלו סגורה מאז השליפה האחרונה (לוח המסחר) לא נשלף כלל
+def download_closes(symbols, timeout=FETCH_TIMEOUT):
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        import pandas as pd
+        return pd.DataFrame()
+
+    # * קיבוץ לפי תאריך התחלה — הורדה אחת לכל קבוצה
+    groups = {}
+    plan = bar_cache.plan_updates(symbols, full_history=True, settled=is_settled)
+    for symbol, start in plan.items():
+        groups.setdefault(start, []).append(symbol)
+    cache_result("bars", True, count=len(symbols) - len(plan))
+    cache_result("bars", False, count=len(plan))
+
+    # * שליפה חלקית שחשפה תיאום מחדש (פיצול/דיבידנד) — אותם סימבולים נשלפים שוב במלואם
+    refetch = []
+    for start, group in groups.items():
+        frame = _fetch_bars(group, start, timeout)
+        if frame is None:
+            continue
+        if start is not None:
+            adjusted = bar_cache.adjusted_symbols(frame, group)
+            refetch.extend(adjusted)
+            group = [s for s in group if s not in adjusted]
+        bar_cache.store_bars(frame, group, full=start is None)
+    if refetch:
+        frame = _fetch_bars(refetch, None, timeout, adjusted=True)
+        if frame is not None:
+            bar_cache.store_bars(frame, refetch, full=True)
+
+    return bar_cache.load_closes(symbols, bars=HISTORY_BARS)
+
+# * חישוב וקטורי של Quote לכל עמודה במטריצת ה־Close
+def compute_quotes(closes):
+    """
+    מקבל DataFrame רחב של מחירי סגירה ומחזיר {סימבול: Quote}.
+    כל המדדים מחושבים במעבר אחד על כל המטריצה (analytics.compute_analytics);
+    כאן רק מתרגמים אותם לשדות הדו״ח.
+    """
+    if closes is None or closes.shape[1] == 0:
+        return {}
+    import numpy as np
+    from analytics import compute_analytics, STREAK_TREND_DAYS, NEAR_HIGH_PCT
+    stats = compute_analytics(closes.to_numpy(dtype="float64", na_value=np.nan))
+
+    table = {}
+    for i, symbol in enumerate(closes.columns):
+        n = stats["counts"][i]
+        current = round(float(stats["current"][i]), 2) if n else None
+        if n == 0:
+            table[symbol] = EMPTY_QUOTE
+        elif n == 1:
+            table[symbol] = Quote(None, current, None)
+        else:
+            streak = stats["streak"][i]
+            trend = TREND_UP if streak >= STREAK_TREND_DAYS else TREND_DOWN if streak <= -STREAK_TREND_DAYS else None
+            sharp = stats["sharp"][i]
+            from_high = stats["from_high"][i]
+            table[symbol] = Quote(
+                round(float(stats["pct"][i]), 2), current, trend,
+                None if np.isnan(sharp) else bool(sharp),
+                None if np.isnan(from_high) else bool(from_high >= -NEAR_HIGH_PCT),
+            )
+    return table
+
+# * שליפה מרוכזת לכל רשימת הטיקרים — קריאה אחת במקום לולאה
+def bulk_quotes(symbols, timeout=FETCH_TIMEOUT):
+    """{סימבול: Quote} מההורדה המרוכזת בלבד; כשל — מילון ריק (המתקשר משלים לכל טיקר)."""
+    try:
+        return compute_quotes(download_closes(symbols, timeout=timeout))
+    except Exception:
+        return {}
+
+def fetch_quotes(symbols, timeout=FETCH_TIMEOUT):
+    """
+    מחזיר {סימבול: Quote} — אותם pct/price/trend כמו get_stock_change לכל טיקר.
+    סימבול שנכשל בהורדה המרוכזת נשלף שוב בנפרד, כך שכשל של אחד לא מפיל את השאר.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    table = bulk_quotes(symbols, timeout=timeout)
+
+    for symbol in symbols:
+        if table.get(symbol, EMPTY_QUOTE) != EMPTY_QUOTE:
+            continue
+        try:
+            table[symbol] = get_stock_change(symbol, timeout=timeout)
+        except Exception:
+            table[symbol] = EMPTY_QUOTE
+    return table
+
+# * שליפה אסינכרונית: חבילות במקביל, timeout לכל בקשה ו־deadline לכל הדו״ח
+async def fetch_quotes_async(symbols, concurrency=FETCH_CONCURRENCY, chunk_size=FETCH_CHUNK_SIZE,
+                             timeout=FETCH_TIMEOUT, deadline=REPORT_DEADLINE):
+    """
+    מחלק את הסימבולים לחבילות ומריץ הורדה מרוכזת לכל חבילה ב־thread pool,
+    עם לכל היותר concurrency בקשות בו־זמנית. סימבול שחסר בתוצאת החבילה נשלף בנפרד,
+    כבקשה עצמאית במאגר עם timeout משלה, ונכנס לטבלה ברגע שהגיע.
+    בקשה שלא הסתיימה תוך timeout, וכל מה שלא הגיע עד deadline — נשאר EMPTY_QUOTE,
+    כך שהדו״ח יוצא בזמן עם "לֹא נִמְצְאוּ נְתוּנִים" עבור החסרים.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    table = {symbol: EMPTY_QUOTE for symbol in symbols}
+    if not symbols:
+        return table
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+    async def run_ticker(symbol):
+        async with semaphore:
+            try:
+                table[symbol] = await asyncio.wait_for(
+                    loop.run_in_executor(executor, get_stock_change, symbol, timeout), timeout)
+            except Exception:
+                pass
+
+    async def run_chunk(chunk):
+        async with semaphore:
+            try:
+                part = await asyncio.wait_for(loop.run_in_executor(executor, bulk_quotes, chunk, timeout), timeout)
+            except Exception:
+                part = {}
+        table.update((symbol, quote) for symbol, quote in part.items() if quote != EMPTY_QUOTE)
+        await asyncio.gather(*(run_ticker(symbol) for symbol in chunk if table[symbol] == EMPTY_QUOTE))
+
+    tasks = [asyncio.create_task(run_chunk(chunk)) for chunk in chunks]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return table
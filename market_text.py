@@ -1,8 +1,17 @@
-import yfinance as yf
+import asyncio
 import datetime
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from functools import lru_cache
 import pytz
-from num2words import num2words
-import pandas as pd
+from market_data import fetch_quotes_async, Quote, EMPTY_QUOTE, REPORT_DEADLINE
+from bar_cache import TODAY_TTL
+from tracing import span, cache_result
+from snapshot_store import load_last_quotes, save_last_quotes, LAST_QUOTES_MAX_AGE
+from market_calendar import TASE, NYSE, JERUSALEM, localize, is_settled, session as market_session
 
 # ===== מילונים עם ניקוד (ניתן להרחיב/לשנות חופשי) =====
 # זמן (שעות/דקות) — לרוב צורת נקבה (דקות), ושעות 1–12
@@ -65,16 +74,99 @@ NUM_WORDS_VALUE = {
     90: "תִּשְׁעִים",
 }
 
+# ===== מנוע מספרים מבוסס טבלה (0–9999, עם ניקוד) =====
+HUNDREDS_WORDS = {
+    1: "מֵאָה",
+    2: "מָאתַיִם",
+    3: "שְׁלוֹשׁ מֵאוֹת",
+    4: "אַרְבַּע מֵאוֹת",
+    5: "חֲמֵשׁ מֵאוֹת",
+    6: "שֵׁשׁ מֵאוֹת",
+    7: "שְׁבַע מֵאוֹת",
+    8: "שְׁמוֹנֶה מֵאוֹת",
+    9: "תְּשַׁע מֵאוֹת",
+}
+
+THOUSANDS_WORDS = {
+    1: "אֶלֶף",
+    2: "אַלְפַּיִם",
+    3: "שְׁלוֹשֶׁת אֲלָפִים",
+    4: "אַרְבַּעַת אֲלָפִים",
+    5: "חֲמֵשֶׁת אֲלָפִים",
+    6: "שֵׁשֶׁת אֲלָפִים",
+    7: "שִׁבְעַת אֲלָפִים",
+    8: "שְׁמוֹנַת אֲלָפִים",
+    9: "תִּשְׁעַת אֲלָפִים",
+    10: "עֲשֶׂרֶת אֲלָפִים",
+}
+
+TABLE_LIMIT = 1000  # 0–999 מחושבים בטעינה; מעבר לזה הרכבה לפי דרישה (ועם lru_cache)
+_SHVA = "\u05b0"
+_HATAF_PATAH = "\u05b2"
+_DAGESH = "\u05bc"
+
+# * ו׳ החיבור לפי הניקוד של תחילת המילה: וּ לפני שווא ובומ״ף, וַ לפני חטף פתח, אחרת וְ
+def _with_vav(word):
+    first = word[0]
+    i = 1
+    while i < len(word) and "\u0591" <= word[i] <= "\u05c7":
+        i += 1
+    marks = word[1:i].replace(_DAGESH, "")
+    rest = first + marks + word[i:]
+    if first in "בּמפ" or _SHVA in marks:
+        return "וּ" + rest
+    if _HATAF_PATAH in marks:
+        return "וַ" + rest
+    return "וְ" + rest
+
+# * חיבור רכיבים: ו׳ החיבור רק לפני הרכיב האחרון
+def _join_parts(parts):
+    if len(parts) == 1:
+        return parts[0]
+    return " ".join(parts[:-1] + [_with_vav(parts[-1])])
+
+def _compose_below_hundred(n, d):
+    if n in d:
+        return d[n]
+    tens = d.get(n - n % 10) or NUM_WORDS_VALUE[n - n % 10]
+    return f"{tens} {_with_vav(d[n % 10])}"
+
+def _compose(n, d):
+    if n < 100:
+        return _compose_below_hundred(n, d)
+    parts = []
+    thousands, rest = divmod(n, 1000)
+    if thousands:
+        parts.append(THOUSANDS_WORDS[thousands] if thousands in THOUSANDS_WORDS
+                     else f"{_compose(thousands, NUM_WORDS_VALUE)} אֶלֶף")
+    hundreds, rest = divmod(rest, 100)
+    if hundreds:
+        parts.append(HUNDREDS_WORDS[hundreds])
+    if rest and rest not in d and rest % 10:
+        # * "עֶשְׂרִים וְשָׁלוֹשׁ" כבר נושא את ו׳ החיבור
+        return " ".join(parts + [_compose_below_hundred(rest, d)])
+    if rest:
+        parts.append(_compose_below_hundred(rest, d))
+    return _join_parts(parts)
+
+# * טבלאות מחושבות מראש לשני ההקשרים
+NUMBER_TABLES = {
+    context: [_compose(n, d) for n in range(TABLE_LIMIT)]
+    for context, d in (("time", NUM_WORDS_TIME), ("value", NUM_WORDS_VALUE))
+}
+
 def _lookup_or_fallback_int(n: int, context: str) -> str:
     """
-    מנסה להחזיר מהמילון המתאים; אם אין — נופל ל־num2words(he).
-    שים לב: אם תרצה צורות מדויקות למספרים "מורכבים" (כמו 23, 57),
-    פשוט הוסף אותם למילון הרצוי.
+    0–999 מהטבלה המחושבת; עד מיליון — הרכבה מאותם רכיבים;
+    רק מעבר לזה נופלים ל־num2words(he).
     """
-    d = NUM_WORDS_TIME if context == "time" else NUM_WORDS_VALUE
-    if n in d:
-        return d[n]
+    table = NUMBER_TABLES["time" if context == "time" else "value"]
+    if n < TABLE_LIMIT:
+        return table[n]
+    if n < 1000000:
+        return _compose(n, NUM_WORDS_TIME if context == "time" else NUM_WORDS_VALUE)
     # נפילה חזרה לפענוח אוטומטי
+    from num2words import num2words  # נדיר — נטען רק כשצריך
     return num2words(n, lang='he')
 
 # * המרת מספרים למילים (עברית) עם הקשר
@@ -92,13 +184,24 @@ def number_to_hebrew_words(number, context: str = "value"):
         sign = "מִינוּס "
     abs_val = abs(number)
 
+    # * עיגול לפי מספר הספרות — הערך המעוגל הוא מפתח המטמון
+    digits = len(str(int(abs_val)))
+    if digits >= 4:
+        key = int(round(abs_val))
+    elif digits == 3:
+        key = round(abs_val, 1)
+    else:
+        key = round(abs_val, 2)
+    return f"{sign}{_abs_number_words(key, context)}"
+
+@lru_cache(maxsize=4096)
+def _abs_number_words(abs_val, context):
     abs_int = int(abs_val)
     digits = len(str(abs_int))
 
     # 4+ ספרות: רק שלם (מעוגל)
     if digits >= 4:
-        integer_words = _lookup_or_fallback_int(int(round(abs_val)), context)
-        return f"{sign}{integer_words}"
+        return _lookup_or_fallback_int(int(round(abs_val)), context)
 
     # 3 ספרות: ספרה עשרונית אחת
     if digits == 3:
@@ -107,9 +210,9 @@ def number_to_hebrew_words(number, context: str = "value"):
         frac_digit = int(round(val * 10)) % 10  # ספרה אחת אחרי הנקודה
         integer_words = _lookup_or_fallback_int(integer_part, context)
         if frac_digit == 0:
-            return f"{sign}{integer_words}"
+            return integer_words
         decimal_words = _lookup_or_fallback_int(frac_digit, "value")
-        return f"{sign}{integer_words} נְקוּדָה {decimal_words}"
+        return f"{integer_words} נְקוּדָה {decimal_words}"
 
     # 1–2 ספרות: עד שתי ספרות עשרוניות
     rounded_number = round(abs_val, 2)
@@ -121,10 +224,10 @@ def number_to_hebrew_words(number, context: str = "value"):
     if decimal_part > 0:
         decimal_words = _lookup_or_fallback_int(decimal_part, "value")
         if integer_part == 0:
-            return f"{sign}אֵפֶס נְקוּדָה {decimal_words}"
-        return f"{sign}{integer_words} נְקוּדָה {decimal_words}"
+            return f"אֵפֶס נְקוּדָה {decimal_words}"
+        return f"{integer_words} נְקוּדָה {decimal_words}"
     else:
-        return f"{sign}{integer_words}"
+        return integer_words
 
 # * פלח זמן כללי
 def get_time_segment(now):
@@ -138,59 +241,17 @@ def get_time_segment(now):
     else:
         return "בַּלָיְלָה"
 
-# * שינוי/רמה/טרנד לטיקר
-def get_stock_change(ticker):
-    stock = yf.Ticker(ticker)
-    try:
-        hist = stock.history(period="10d", interval="1d")
-    except Exception:
-        return None, None, None
-    if hist is None or hist.empty or "Close" not in hist.columns:
-        return None, None, None
-    hist = hist.dropna(subset=["Close"])
-
-    # * צריך 2+ נרות
-    if len(hist) < 2:
-        if len(hist) == 1:
-            price_only = float(hist["Close"].iloc[-1])
-            return None, round(price_only, 2), None
-        return None, None, None
-
-    # * המרת אזור זמן (חסין)
-    jerusalem = pytz.timezone("Asia/Jerusalem")
-    ts = hist.index[-1]
-    try:
-        if getattr(ts, "tzinfo", None) is not None:
-            _ = ts.tz_convert(jerusalem) if hasattr(ts, "tz_convert") else ts.astimezone(jerusalem)
-        else:
-            ts_utc = pytz.utc.localize(ts)
-            _ = ts_utc.astimezone(jerusalem)
-    except Exception:
-        pass
-
-    current = float(hist["Close"].iloc[-1])
-    prev = float(hist["Close"].iloc[-2])
-    pct = ((current - prev) / prev) * 100 if prev != 0 else 0.0
-
-    # * טרנד עם 3+ נרות
-    trend = None
-    if len(hist) >= 3:
-        before_prev = float(hist["Close"].iloc[-3])
-        if current > prev > before_prev:
-            trend = "מַמְשִׁיךְ לַעֲלוֹת"
-        elif current < prev < before_prev:
-            trend = "מַמְשִׁיךְ לְרֵדֶת"
-
-    return round(pct, 2), round(current, 2), trend
-
-# * ניסוח כיוון (סף דרמטי; זכר/נקבה)
-def format_direction(pct, trend, threshold=1.5, is_female=False):
+# * ניסוח כיוון (חדות לפי תנודתיות, או סף קבוע; זכר/נקבה)
+def format_direction(pct, trend, threshold=1.5, is_female=False, sharp=None):
+    """sharp: הכרעת התנודתיות מ־analytics; None — אין מספיק היסטוריה, והסף הקבוע קובע."""
     if pct is None:
         return "לֹא זָמִין"
+    if sharp is None:
+        sharp = abs(pct) >= threshold
     if trend:
         base = trend
     else:
-        if abs(pct) >= threshold:
+        if sharp:
             base = "עוֹלֶה בְּחַדוּת" if pct > 0 else "יוֹרֵד בְּחַדוּת"
         else:
             base = "עוֹלֶה" if pct > 0 else "יוֹרֵד"
@@ -199,247 +260,467 @@ def format_direction(pct, trend, threshold=1.5, is_female=False):
     return base
 
 # * כיוון מיוחד לדולר: "מִתְחַזֵּק/נֶחְלָשׁ" או "מַמְשִׁיךְ לְהִתְחַזֵּק/לְהֵיחָלֵשׁ"
-def format_usd_direction(pct, trend, threshold=1.5):
+def format_usd_direction(pct, trend, threshold=1.5, sharp=None):
     if pct is None:
         return "לֹא זָמִין"
+    if sharp is None:
+        sharp = abs(pct) >= threshold
     if trend:
         return "מַמְשִׁיךְ לְהִתְחַזֵּק" if pct > 0 else "מַמְשִׁיךְ לְהֵיחָלֵשׁ"
-    if abs(pct) >= threshold:
+    if sharp:
         return "מִתְחַזֵּק בְּחַדוּת" if pct > 0 else "נֶחְלָשׁ בְּחַדוּת"
     return "מִתְחַזֵּק" if pct > 0 else "נֶחְלָשׁ"
 
-# * דו״ח תמונת שוק
-def get_market_report():
-    # * טיקרים: ישראל/קריפּטו/סחורות/דולר
-    tickers = {
-        "תֵל אָבִיב מֵאָה עֵשְׂרִים וֵחָמֵשׁ": "^TA125.TA",
-        "תֵל אָבִיב שְׁלוֹשִׁים וֵחָמֵשׁ": "TA35.TA",
-        "בִּיטְקוֹיִן": "BTC-USD",
-        "אִיתֵרְיוּם": "ETH-USD",
-        "זָהָב": "GC=F",
-        "נֶפְט": "CL=F",
-        "דוֹלָר": "USDILS=X"
+# ===== יקום הטיקרים =====
+# * מכשיר: שם (כפי שנאמר בתבנית), סימבול, שם תצוגה, מין דקדוקי, יחידה,
+# סף "בְּחַדוּת" (כשאין מספיק היסטוריה לתנודתיות), סוג ניסוח כיוון
+Instrument = namedtuple(
+    "Instrument",
+    ["name", "symbol", "display", "is_female", "unit", "threshold", "direction"],
+    defaults=("", False, "", 1.5, "default"),
+)
+
+# * שעות מסחר תל אביב (לפי לוח המסחר: ימי מסחר, חגים, יום שישי מקוצר); None — אין מסחר היום
+def get_tase_session(now):
+    return _jerusalem_session(TASE, now)
+
+# * שעות מסחר ניו־יורק (שעון ישראל; לפי לוח המסחר — חגים, ימים מקוצרים, שעון קיץ); None — אין מסחר היום
+def get_ny_session(now):
+    return _jerusalem_session(NYSE, now)
+
+def _jerusalem_session(exchange, now):
+    hours = market_session(exchange, localize(now).astimezone(JERUSALEM).date())
+    if hours is None:
+        return None
+    return tuple(JERUSALEM.normalize(t.astimezone(JERUSALEM)) for t in hours)
+
+# * ענף מצב השוק שהדו״ח בוחר (ישראל, ארה״ב)
+def get_market_state(now):
+    now = localize(now)
+    tase_session = get_tase_session(now)
+    if tase_session is None:  # * שבת/חג → ת״א סגורה
+        tase = "closed"
+    elif now < tase_session[0]:
+        tase = "pre"
+    elif now > tase_session[1]:
+        tase = "closed"
+    else:
+        tase = "open"
+
+    ny_session = get_ny_session(now)
+    if ny_session is None:  # * סוף שבוע/חג → ארה״ב סגוּרה
+        us = "weekend"
+    elif now < ny_session[0]:
+        us = "pre"
+    elif now > ny_session[1]:
+        us = "post"
+    else:
+        us = "live"
+    return tase, us
+
+# * זמן עד פתיחת הבורסה בתל אביב (שעות, דקות)
+def get_tase_countdown(now):
+    open_time, _ = get_tase_session(now)
+    hours, remainder = divmod(int((open_time - localize(now)).total_seconds()), 3600)
+    return hours, remainder // 60
+
+# ===== תבניות הדו״ח =====
+# שדות בתבנית שורה: {name} {display} {unit} — קבועים למכשיר (מוצבים בהידור);
+# {direction} {verb} {pct} {price} — מחושבים מהנתונים בזמן הרינדור.
+NO_DATA = "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר {display}.\n"
+
+def _tase_countdown_note(now):
+    hours, minutes = get_tase_countdown(now)
+    return (
+        f"הַבּוּרְסָה טֶרֶם נִפְתֵחָה וּצְפוּיָה לֵהִיפָּתָח בְּעוֹד "
+        f"{number_to_hebrew_words(hours, context='time')} שָׁעוֹת וְ-{number_to_hebrew_words(minutes, context='time')} דָקוֹת.\n"
+    )
+
+# ===== בוני מקטעים =====
+# spec מרשימת הצפייה → כותרת, השוק שקובע את הענף, ולכל ענף — הערה, מכשירים, תבנית שורה, תבנית חוסר ושדות חובה.
+# * ישראל
+def _israel_section(spec, groups):
+    return {
+        "header": spec.get("header", "בְּיִשְׂרָאֵל:\n"),
+        "market": "tase",
+        "branches": {
+            "pre": {"note": _tase_countdown_note, "instruments": []},
+            "closed": {
+                "note": "הַבּוּרְסָה נִסְגְּרָה.\n",
+                "instruments": groups[spec["instruments"]],
+                "line": "מַדָד {name} {verb} בְּ-{pct} אָחוּז וְנִנְעַל בְּרָמָה שֶׁל {price} נְקוּדוֹת.\n",
+                "missing": "",
+                "needs": ("pct", "price"),
+            },
+            "open": {
+                "instruments": groups[spec["instruments"]],
+                "line": "מַדָד {name} {direction} בְּ-{pct} אָחוּז וְעוֹמֵד כָּעֵת עַל {price} נְקוּדוֹת.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד {name}.\n",
+                "needs": ("pct", "price"),
+            },
+        },
     }
 
-    # * מדדי מקור בארה״ב
-    us_indices = {
-        "אֵס אֵנְד פִּי חָמֵשׁ מֵאוֹת": "^GSPC",
-        "נָאסְדָק": "^IXIC",
-        "דָאוֹ ג׳וֹנְס": "^DJI",
-        "רַאסֶל אָלְפָּיים": "^RUT"
+# * בורסות העולם: מדדים בשעות המסחר, תעודות סל לפני/אחרי
+def _world_section(spec, groups):
+    return {
+        "header": spec.get("header", "\nבְּבוּרְסוֹת הָעוֹלָם:\n"),
+        "market": "us",
+        "branches": {
+            "weekend": {
+                "note": "הַבּוּרְסָה בְּאַרְצוֹת הַבְּרִית סְגוּרָה; הַנְּתוּנִים מִתְיַחֲסִים לְשַׁעֲרֵי הַסְגִירָה הָאַחֲרוֹנִים.\n",
+                "instruments": groups[spec["indices"]],
+                "line": "מַדָד ה{name} עוֹמֵד כָּעֵת עַל {price} נְקוּדוֹת.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n",
+                "needs": ("price",),
+            },
+            "pre": {
+                "note": "הָמִסְחָר בָּבּוּרְסָה עָדָין לֹא נִפְתָח; הַנְּתוּנִים מִתָיָחָסִים לֵמִסְחָר מוּקְדָם בְּתְעוּדוֹת סַל.\n",
+                "instruments": groups[spec["etfs"]],
+                "line": "מַדָד ה{name} {direction} בְּ-{pct} אָחוּז.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד הָ{name}.\n",
+                "needs": ("pct",),
+            },
+            "post": {
+                "note": "הָבּוּרָסָה בֵּנוּ יוֹרְק נִסְגְּרָה; הַנְּתוּנִים מִמִּסְחָר מְאֻחָר בְּתְעוּדוֹת סַל.\n",
+                "instruments": groups[spec["etfs"]],
+                "line": "מַדָד ה{name} {direction} בְּ-{pct} אָחוּז.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n",
+                "needs": ("pct",),
+            },
+            "live": {
+                "instruments": groups[spec["indices"]],
+                "line": "מַדָד ה{name} {direction} בְּ-{pct} אָחוּז וְעוֹמֵד כָּעֵת עַל {price} נְקוּדוֹת.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n",
+                "needs": ("pct", "price"),
+            },
+        },
     }
-    # * ETF עוקבים
-    us_etfs = {
-        "אֵס אֵנְד פִּי חָמֵשׁ מֵאוֹת": "SPY",
-        "נָאסְדָק": "QQQ",
-        "דָאוֹ ג׳וֹנְס": "DIA",
-        "רַאסֶל אָלְפָּיים": "IWM"
+
+# * מניות (ענפי ארה״ב)
+def _stocks_section(spec, groups):
+    return {
+        "header": spec.get("header", "\nבֵּשׁוּק הַמְּנָיוֹת:\n"),
+        "market": "us",
+        "branches": {
+            "weekend": {
+                "note": "הַבּוּרְסָה סְגוּרָה; הַנְּתוּנִים מִיתְיָחָסִים לִשְׁעָרֵי הַסְגִירָה הָאַחֲרוֹנִים.\n",
+                "instruments": groups[spec["instruments"]],
+                "line": "מניית {name} נִסְגְּרָה בְּשַׁעַר {price} {unit}.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיית {name}.\n",
+                "needs": ("price",),
+            },
+            "pre": {
+                "note": "הַבּוּרְסָה סְגוּרָה כָּרֶגַע; הַנְּתוּנִים הֵם מִמִּסְחָר מוּקְדָם.\n",
+                "instruments": groups[spec["instruments"]],
+                "line": "מֵנָיָית {name} {direction} בְּ-{pct} אָחוּז.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {name}.\n",
+                "needs": ("pct",),
+            },
+            "post": {
+                "note": "הַבּוּרְסָה נִסְגְּרָה; הַנְּתוּנִים מִמִּסְחָר מְאֻחָר.\n",
+                "instruments": groups[spec["instruments"]],
+                "line": "מֵנָיָית {name} {direction} בְּ-{pct} אָחוּז.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {name}.\n",
+                "needs": ("pct",),
+            },
+            "live": {
+                "instruments": groups[spec["instruments"]],
+                "line": "מֵנָיָית {name} {direction} בְּ-{pct} אָחוּז וְנִסְחֶרֶת כָּעֵת בִּשְׁעַר {price} {unit}.\n",
+                "missing": "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {name}.\n",
+                "needs": ("pct", "price"),
+            },
+        },
     }
-    # * מניות בולטות (נקבה)
-    us_stocks = {
-        "אַפֵּל": "AAPL",
-        "אֵנְבִידְיָה": "NVDA",
-        "אָמָזוֹן": "AMZN",
-        "טֵסְלָה": "TSLA"
+
+# * קריפטו
+def _crypto_section(spec, groups):
+    return {
+        "header": spec.get("header", "\nבֵּגִזְרָת הַקְרִיפְּטוֹ:\n"),
+        "branches": {
+            None: {
+                "instruments": groups[spec["instruments"]],
+                "line": "{display} {direction} בְּ-{pct} אָחוּז וְנִסְחָר בִּשְׁעַר שֶׁל {price} דוֹלָר.\n",
+                "missing": NO_DATA,
+                "needs": ("pct", "price"),
+            },
+        },
     }
-    
-    now = datetime.datetime.now(pytz.timezone("Asia/Jerusalem"))
-    is_us_market_closed_weekend = now.weekday() in [5, 6]  # * שבת/ראשון → ארה״ב סגוּרה
 
-    # * זמן פתיח עם מילון זמן
+# * סחורות
+def _commodities_section(spec, groups):
+    return {
+        "header": spec.get("header", "\nעוֹד בָּעוֹלָם:\n"),
+        "branches": {
+            None: {
+                "instruments": groups[spec["instruments"]],
+                "line": "{display} {direction} וְעוֹמֵד כָּעֵת עַל {price} {unit}.\n",
+                "missing": NO_DATA,
+                "needs": ("pct", "price"),
+            },
+        },
+    }
+
+# * דולר/שקל
+def _usd_section(spec, groups):
+    return {
+        "header": spec.get("header", "\n"),
+        "branches": {
+            None: {
+                "instruments": groups[spec["instruments"]],
+                "line": "{display} {direction} מוּל הַשֶּׁקֶל וְנִסְחָר בִּשְׁעַר שֶׁל {price} שְׁקָלִים.\n",
+                "missing": NO_DATA,
+                "needs": ("pct", "price"),
+            },
+        },
+    }
+
+SECTION_KINDS = {
+    "israel": _israel_section,
+    "world": _world_section,
+    "stocks": _stocks_section,
+    "crypto": _crypto_section,
+    "commodities": _commodities_section,
+    "usd": _usd_section,
+}
+
+# ===== הידור התבניות לפונקציות רינדור (פעם אחת, בטעינת המודול) =====
+_QUOTE_FIELDS = {"pct": 0, "price": 1}
+NEAR_HIGH_NOTE = ", סָמוּךְ לַשִּׂיא הַשְּׁנָתִי"
+STALE_NOTE = ", נָכוֹן לִפְנֵי "
+
+# * גיל נתון (דקות) במילים: "דַּקָּה", "שְׁעָתַיִם", "עֶשֶׂר דַּקּוֹת"...
+def format_age(minutes):
+    minutes = max(1, int(minutes))
+    if minutes < 60:
+        return {1: "דַּקָּה", 2: "שְׁתֵּי דַּקּוֹת"}.get(minutes) or f"{number_to_hebrew_words(minutes, context='time')} דַּקּוֹת"
+    hours = minutes // 60
+    if hours < 24:
+        return {1: "שָׁעָה", 2: "שְׁעָתַיִם"}.get(hours) or f"{number_to_hebrew_words(hours, context='time')} שָׁעוֹת"
+    return {1: "יוֹם", 2: "יוֹמַיִם"}.get(hours // 24, "כַּמָּה יָמִים")
+
+def _direction_function(inst):
+    if inst.direction == "usd":
+        return lambda pct, trend, sharp: format_usd_direction(pct, trend, threshold=inst.threshold, sharp=sharp)
+    return lambda pct, trend, sharp: format_direction(pct, trend, threshold=inst.threshold, is_female=inst.is_female, sharp=sharp)
+
+# * שורה למכשיר: מציב את השדות הקבועים, ומחזיר פונקציה quote → טקסט
+def compile_line(inst, line, missing, needs):
+    static = {"name": inst.name, "display": inst.display or inst.name, "unit": inst.unit}
+    dynamic = {field: "{" + field + "}" for field in ("direction", "verb", "pct", "price")}
+    template = line.format(**static, **dynamic)
+    missing_text = missing.format(**static)
+    required = tuple(_QUOTE_FIELDS[field] for field in needs)
+    uses = {field for field in dynamic if "{" + field + "}" in template}
+    # * הערות בסוף השורה (שיא שנתי, גיל של נתון מהמטמון) — לפני הנקודה
+    body, end = (template[:-2], template[-2:]) if template.endswith(".\n") else (template, "")
+    notes_high = "direction" in uses and bool(end)
+    direction_of = _direction_function(inst)
+
+    def render(quote):
+        if any(quote[i] is None for i in required):
+            return missing_text
+        pct, price, trend, sharp, near_high, age = Quote(*quote)
+        values = {}
+        if "direction" in uses:
+            values["direction"] = direction_of(pct, trend, sharp)
+        if "verb" in uses:
+            values["verb"] = "עָלָה" if pct > 0 else "יָרַד"
+        if "pct" in uses:
+            values["pct"] = number_to_hebrew_words(abs(pct))
+        if "price" in uses:
+            values["price"] = number_to_hebrew_words(price)
+        notes = NEAR_HIGH_NOTE if near_high and notes_high else ""
+        if age is not None and end:
+            notes += STALE_NOTE + format_age(age)
+        return body.format(**values) + notes + end
+
+    return render
+
+# * מקטע מהודר: (כותרת, שוק, {ענף: (הערה, [(מכשיר, רינדור), ...])})
+def compile_sections(sections):
+    compiled = []
+    for section in sections:
+        branches = {}
+        for branch, spec in section["branches"].items():
+            lines = [
+                (inst, compile_line(inst, spec["line"], spec["missing"], spec["needs"]))
+                for inst in spec["instruments"]
+            ]
+            branches[branch] = (spec.get("note", ""), lines)
+        compiled.append((section["header"], section.get("market"), branches))
+    return compiled
+
+# ===== רשימת צפייה: קבוצות מכשירים ופרופילי דו״ח (watchlist.json) =====
+WATCHLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watchlist.json")
+DEFAULT_PROFILE = "main"
+
+def load_watchlist(path=WATCHLIST_PATH):
+    """
+    מבנה הקובץ:
+      "groups":   {שם קבוצה: [{"name", "symbol", ושדות Instrument אופציונליים}, ...]}
+      "profiles": {שם פרופיל: {"sections": [{"kind": סוג מקטע מ־SECTION_KINDS, שמות הקבוצות שלו, "header" אופציונלי}, ...],
+                               "targets": [שלוחות] אופציונלי}}
+    מחזיר ({שם פרופיל: מקטעים מהודרים}, {שם פרופיל: שלוחות או None}).
+    None — לא הוגדרו שלוחות (main.py משתמש ב־TARGET_PATHS); רשימה ריקה — הפרופיל לא מועלה.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    groups = {name: [Instrument(**item) for item in items] for name, items in data["groups"].items()}
+    profiles = {}
+    targets = {}
+    for name, profile in data["profiles"].items():
+        sections = []
+        for spec in profile["sections"]:
+            if spec["kind"] not in SECTION_KINDS:
+                raise ValueError(f"סוג מקטע לא מוכר בפרופיל {name}: {spec['kind']}")
+            sections.append(SECTION_KINDS[spec["kind"]](spec, groups))
+        profiles[name] = compile_sections(sections)
+        targets[name] = profile.get("targets")
+    return profiles, targets
+
+PROFILES, PROFILE_TARGETS = load_watchlist()
+COMPILED_SECTIONS = PROFILES[DEFAULT_PROFILE]
+
+# * המכשירים שמופיעים בדו״ח במצב השוק הנתון
+def get_report_instruments(now, sections=COMPILED_SECTIONS):
+    tase, us = get_market_state(now)
+    state = {"tase": tase, "us": us, None: None}
+    return [inst for _, market, branches in sections for inst, _ in branches[state[market]][1]]
+
+# * ריכוז כל הטיקרים לשליפה לפי מצב השוק
+def get_tickers_to_fetch(now, sections=COMPILED_SECTIONS):
+    return {inst.name: inst.symbol for inst in get_report_instruments(now, sections)}
+
+# * כל הסימבולים של כל הפרופילים — כל סימבול פעם אחת בלבד
+def get_symbols_for_profiles(now, profiles=PROFILES):
+    symbols = {}
+    for sections in profiles.values():
+        symbols.update(dict.fromkeys(inst.symbol for inst in get_report_instruments(now, sections)))
+    return list(symbols)
+
+# * הסימבולים שבענפי מסחר חי (ת״א פתוחה / ארה״ב באמצע סשן) — נשלפים מנרות דקה
+LIVE_BRANCHES = {"open", "live"}
+INTRADAY_LIVE = True  # False: גם ענפי המסחר החי נשענים על הנר היומי
+
+def get_live_symbols(now, profiles=PROFILES):
+    tase, us = get_market_state(now)
+    state = {"tase": tase, "us": us, None: None}
+    symbols = {}
+    for sections in profiles.values():
+        for _, market, branches in sections:
+            if state[market] in LIVE_BRANCHES:
+                symbols.update(dict.fromkeys(inst.symbol for inst, _ in branches[state[market]][1]))
+    return list(symbols)
+
+# * טבלת נתונים לדו״ח: שמור וטרי מהמטמון, ענפים חיים מהמנוע התוך־יומי,
+# כל השאר (וכל מה שחסר) מהנרות היומיים. deadline אחד לכל השלבים — כל שלב מקבל רק את הזמן שנותר
+async def fetch_report_quotes(now, profiles=PROFILES, deadline=REPORT_DEADLINE):
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    symbols = get_symbols_for_profiles(now, profiles)
+    cached = fresh_cached_quotes(symbols)
+    missing = [s for s in symbols if s not in cached]
+    if not missing:
+        return cached
+    quotes = {}
+    if INTRADAY_LIVE:
+        from intraday import fetch_intraday_quotes_async  # pandas + yfinance — רק כשבאמת שולפים
+        live = await fetch_intraday_quotes_async([s for s in get_live_symbols(now, profiles) if s in missing],
+                                                 deadline=max(0.0, deadline_at - loop.time()), now=now)
+        quotes.update((symbol, quote) for symbol, quote in live.items() if quote[0] is not None)
+    quotes.update(await fetch_quotes_async([s for s in missing if s not in quotes],
+                                           deadline=max(0.0, deadline_at - loop.time())))
+    return {**cached, **fill_from_last_good(quotes, missing)}
+
+# * מסלול מהיר: סימבול שנשמר לפני פחות מ־TODAY_TTL, או שהבורסה שלו סגורה מאז שנשמר
+# (לוח המסחר) — לא נשלף שוב; כשכולם כאלה לא נטענים גם pandas/yfinance
+def fresh_cached_quotes(symbols, ttl=TODAY_TTL):
+    last = load_last_quotes()
+    now = time.time()
+    cached = {
+        symbol: Quote(*last[symbol][0]) for symbol in symbols
+        if symbol in last and (now - last[symbol][1] < ttl or is_settled(symbol, last[symbol][1], now))
+    }
+    cache_result("quotes", True, count=len(cached))
+    cache_result("quotes", False, count=len(symbols) - len(cached))
+    return cached
+
+# * השלמה מהמצב הטוב האחרון: סימבול בלי נתונים מקבל את הנתון השמור, עם גילו בדקות
+def fill_from_last_good(quotes, symbols, now=None):
+    now = time.time() if now is None else now
+    fresh = {symbol: Quote(*quote)[:5] for symbol, quote in quotes.items() if quote[0] is not None}
+    last = load_last_quotes()
+    if fresh:
+        save_last_quotes(fresh, now=now)
+    for symbol in symbols:
+        if quotes.get(symbol, EMPTY_QUOTE)[0] is not None or symbol not in last:
+            continue
+        fields, at = last[symbol]
+        if now - at <= LAST_QUOTES_MAX_AGE:
+            quotes[symbol] = Quote(*fields, age=int((now - at) // 60))
+    return quotes
+
+# * פתיח עם שעה
+def render_intro(now):
     hour_24 = now.hour
     hour_12 = hour_24 if hour_24 <= 12 else hour_24 - 12
-    minute = now.minute
-    hour_str = f"{number_to_hebrew_words(hour_12, context='time')} וְ{number_to_hebrew_words(minute, context='time')} דַּקוֹת"
-    segment = get_time_segment(now)
-    report = f"הִנֵה תְמוּנַת הַשׁוּק, נָכוֹן לְשָׁעָה {hour_str} {segment}.\n\n"
-
-    results = {}
-
-    # * שעות מסחר ניו־יורק (שעון ישראל)
-    ny_open = now.replace(hour=16, minute=30, second=0, microsecond=0)
-    ny_close = now.replace(hour=23, minute=0, second=0, microsecond=0)
-
-    # * מקור נתונים למדדים
-    if is_us_market_closed_weekend:
-        indices_source = us_indices
-    elif now < ny_open or now > ny_close:
-        indices_source = us_etfs
-    else:
-        indices_source = us_indices
-
-    # * ריכוז כל הטיקרים
-    all_tickers_to_fetch = {**tickers}
-    all_tickers_to_fetch.update(indices_source)
-    all_tickers_to_fetch.update(us_stocks)
-    
-    # * שליפה
-    for name, ticker in all_tickers_to_fetch.items():
-        try:
-            pct, price, trend = get_stock_change(ticker)
-            results[name] = {"pct": pct, "price": price, "trend": trend}
-        except Exception:
-            results[name] = {"pct": None, "price": None, "trend": None}
-
-    # * ישראל
-    open_time = now.replace(hour=9, minute=59, second=0, microsecond=0)
-    close_time = now.replace(hour=17, minute=25, second=0, microsecond=0)
-    ta125 = results.get("תֵל אָבִיב מֵאָה עֵשְׂרִים וֵחָמֵשׁ", {})
-    ta35 = results.get("תֵל אָבִיב שְׁלוֹשִים וֵחָמֵשׁ", {})
-
-    if now < open_time:
-        delta = open_time - now
-        hours, remainder = divmod(int(delta.total_seconds()), 3600)
-        minutes = remainder // 60
-        report += (
-            "בְּיִשְׂרָאֵל:\n"
-            f"הַבּוּרְסָה טֶרֶם נִפְתֵחָה וּצְפוּיָה לֵהִיפָּתָח בְּעוֹד "
-            f"{number_to_hebrew_words(hours, context='time')} שָׁעוֹת וְ-{number_to_hebrew_words(minutes, context='time')} דָקוֹת.\n"
-        )
-    elif now > close_time:
-        report += "בְּיִשְׂרָאֵל:\nהַבּוּרְסָה נִסְגְּרָה.\n"
-        if ta125.get("price") is not None and ta125.get("pct") is not None:
-            verb1 = "עָלָה" if ta125["pct"] > 0 else "יָרַד"
-            report += (
-                f"מַדָד תֵל אָבִיב מֵאָה עֵשְׂרִים וֵחָמֵשׁ {verb1} בְּ-{number_to_hebrew_words(abs(ta125['pct']))} אָחוּז "
-                f"וְנִנְעַל בְּרָמָה שֶׁל {number_to_hebrew_words(ta125['price'])} נְקוּדוֹת.\n"
-            )
-        if ta35.get("price") is not None and ta35.get("pct") is not None:
-            verb2 = "עָלָה" if ta35["pct"] > 0 else "יָרַד"
-            report += (
-                f"מַדָד תֵל אָבִיב שְׁלוֹשִים וֵחָמֵשׁ {verb2} בְּ-{number_to_hebrew_words(abs(ta35['pct']))} אָחוּז "
-                f"וְנִנְעַל בְּרָמָה שֶׁל {number_to_hebrew_words(ta35['price'])} נְקוּדוֹת.\n"
-            )
-    else:
-        report += "בְּיִשְׂרָאֵל:\n"
-        for name in ["תֵל אָבִיב מֵאָה עֵשְׂרִים וֵחָמֵשׁ", "תֵל אָבִיב שְׁלוֹשִים וֵחָמֵשׁ"]:
-            d = results.get(name, {})
-            if d.get("pct") is None or d.get("price") is None:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד {name}.\n"
-                continue
-            direction = format_direction(d.get("pct"), d.get("trend"))
-            report += (
-                f"מַדָד {name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז "
-                f"וְעוֹמֵד כָּעֵת עַל {number_to_hebrew_words(d.get('price', 0))} נְקוּדוֹת.\n"
-            )
-
-    # * בורסות העולם (ארה״ב) — הצגה כ"מדד ה..."
-    report += "\nבְּבוּרְסוֹת הָעוֹלָם:\n"
-    if is_us_market_closed_weekend:
-        report += "הַבּוּרְסָה בְּאַרְצוֹת הַבְּרִית סְגוּרָה; הַנְּתוּנִים מִתְיַחֲסִים לְשַׁעֲרֵי הַסְגִירָה הָאַחֲרוֹנִים.\n"
-        for name in us_indices.keys():
-            d = results.get(name, {})
-            if d.get("price") is not None:
-                report += f"מַדָד ה{name} עוֹמֵד כָּעֵת עַל {number_to_hebrew_words(d['price'])} נְקוּדוֹת.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n"
-    elif now < ny_open:
-        report += "הָמִסְחָר בָּבּוּרְסָה עָדָין לֹא נִפְתָח; הַנְּתוּנִים מִתָיָחָסִים לֵמִסְחָר מוּקְדָם בְּתְעוּדוֹת סַל.\n"
-        for name in us_etfs.keys():
-            d = results.get(name, {})
-            if d.get("pct") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"))
-                report += f"מַדָד ה{name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד הָ{name}.\n"
-    elif now > ny_close:
-        report += "הָבּוּרָסָה בֵּנוּ יוֹרְק נִסְגְּרָה; הַנְּתוּנִים מִמִּסְחָר מְאֻחָר בְּתְעוּדוֹת סַל.\n"
-        for name in us_etfs.keys():
-            d = results.get(name, {})
-            if d.get("pct") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"))
-                report += f"מַדָד ה{name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n"
-    else:
-        for name in us_indices.keys():
-            d = results.get(name, {})
-            if d.get("pct") is not None and d.get("price") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"))
-                report += (
-                    f"מַדָד ה{name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז "
-                    f"וְעוֹמֵד כָּעֵת עַל {number_to_hebrew_words(d.get('price', 0))} נְקוּדוֹת.\n"
-                )
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מַדָד ה{name}.\n"
-
-    # * שוק המניות — "מניית ..."
-    report += "\nבֵּשׁוּק הַמְּנָיוֹת:\n"
-    if is_us_market_closed_weekend:
-        report += "הַבּוּרְסָה סְגוּרָה; הַנְּתוּנִים מִיתְיָחָסִים לִשְׁעָרֵי הַסְגִירָה הָאַחֲרוֹנִים.\n"
-        for stock_name in us_stocks.keys():
-            d = results.get(stock_name, {})
-            if d.get("price") is not None:
-                report += f"מניית {stock_name} נִסְגְּרָה בְּשַׁעַר {number_to_hebrew_words(d['price'])} דוֹלָר.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיית {stock_name}.\n"
-    elif now < ny_open:
-        report += "הַבּוּרְסָה סְגוּרָה כָּרֶגַע; הַנְּתוּנִים הֵם מִמִּסְחָר מוּקְדָם.\n"
-        for stock_name in us_stocks.keys():
-            d = results.get(stock_name, {})
-            if d.get("pct") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"), threshold=5, is_female=True)
-                report += f"מֵנָיָית {stock_name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {stock_name}.\n"
-    elif now > ny_close:
-        report += "הַבּוּרְסָה נִסְגְּרָה; הַנְּתוּנִים מִמִּסְחָר מְאֻחָר.\n"
-        for stock_name in us_stocks.keys():
-            d = results.get(stock_name, {})
-            if d.get("pct") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"), threshold=5, is_female=True)
-                report += f"מֵנָיָית {stock_name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז.\n"
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {stock_name}.\n"
-    else:
-        for stock_name in us_stocks.keys():
-            d = results.get(stock_name, {})
-            if d.get("pct") is not None and d.get("price") is not None:
-                direction = format_direction(d.get("pct"), d.get("trend"), threshold=5, is_female=True)
-                report += (
-                    f"מֵנָיָית {stock_name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז "
-                    f"וְנִסְחֶרֶת כָּעֵת בִּשְׁעַר {number_to_hebrew_words(d.get('price', 0))} דוֹלָר.\n"
-                )
-            else:
-                report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר מֵנָיָית {stock_name}.\n"
-
-    # * קְרִיפְּטוֹ — הקדמה + "הַבִּיטְקוֹיִן / הָאִיתֵרְיוּם"
-    report += "\nבֵּגִזְרָת הַקְרִיפְּטוֹ:\n"
-    for internal_name, display_name in [("בִּיטְקוֹיִן", "הַבִּיטְקוֹיִן"), ("אִיתֵרְיוּם", "הָאִיתֵרְיוּם")]:
-        d = results.get(internal_name, {})
-        if d.get("pct") is not None and d.get("price") is not None:
-            direction = format_direction(d.get("pct"), d.get("trend"), is_female=False)
-            report += (
-                f"{display_name} {direction} בְּ-{number_to_hebrew_words(abs(d.get('pct', 0)))} אָחוּז "
-                f"וְנִסְחָר בִּשְׁעַר שֶׁל {number_to_hebrew_words(d.get('price', 0))} דוֹלָר.\n"
-            )
-        else:
-            report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר {display_name}.\n"
-
-    # * עוֹד בָּעוֹלָם — זהב, נפט
-    report += "\nעוֹד בָּעוֹלָם:\n"
-    for name, unit, display in [("זָהָב", "לְאוֹנְקִיָה", "הַזָּהָב"), ("נֶפְט", "לְחָבִית", "הַנֶּפְט")]:
-        d = results.get(name, {})
-        if d.get("pct") is not None and d.get("price") is not None:
-            direction = format_direction(d.get("pct"), d.get("trend"), is_female=False)
-            report += f"{display} {direction} וְעוֹמֵד כָּעֵת עַל {number_to_hebrew_words(d.get('price', 0))} {unit}.\n"
-        else:
-            report += f"לֹא נִמְצְאוּ נְתוּנִים עֲבוּר {display}.\n"
-
-    # * הדולר — בסוף: "מִתְחַזֵּק/נֶחְלָשׁ" או "מַמְשִׁיךְ..."
-    d_usd = results.get("דוֹלָר", {})
-    report += "\n"
-    if d_usd.get("pct") is not None and d_usd.get("price") is not None:
-        usd_dir = format_usd_direction(d_usd.get("pct"), d_usd.get("trend"))
-        report += (
-            f"הַדּוֹלָר {usd_dir} מוּל הַשֶּׁקֶל "
-            f"וְנִסְחָר בִּשְׁעַר שֶׁל {number_to_hebrew_words(d_usd.get('price', 0))} שְׁקָלִים.\n"
-        )
-    else:
-        report += "לֹא נִמְצְאוּ נְתוּנִים עֲבוּר הַדּוֹלָר.\n"
+    hour_str = f"{number_to_hebrew_words(hour_12, context='time')} וְ{number_to_hebrew_words(now.minute, context='time')} דַּקוֹת"
+    return f"הִנֵה תְמוּנַת הַשׁוּק, נָכוֹן לְשָׁעָה {hour_str} {get_time_segment(now)}.\n\n"
+
+# * רינדור: בחירת ענף לכל מקטע וחיבור אחד של כל החלקים
+def render_report(now, quotes, sections=COMPILED_SECTIONS):
+    tase, us = get_market_state(now)
+    state = {"tase": tase, "us": us, None: None}
+    parts = [render_intro(now)]
+    for header, market, branches in sections:
+        note, lines = branches[state[market]]
+        parts.append(header)
+        parts.append(note(now) if callable(note) else note)
+        parts.extend(render(quotes.get(inst.symbol, EMPTY_QUOTE)) for inst, render in lines)
+    return "".join(parts)
 
-    return report
+# * דו״ח תמונת שוק
+def get_market_report(now=None, quotes=None):
+    """
+    now: זמן הדו״ח (ברירת מחדל — עכשיו, שעון ירושלים).
+    quotes: טבלת {סימבול: (pct, price, trend)} שכבר נשלפה; אם None — נשלף כאן,
+    באותו מסלול כמו מחזור השירות (מטמון, מנוע תוך־יומי, השלמה מהמצב הטוב האחרון).
+    """
+    if now is None:
+        now = datetime.datetime.now(pytz.timezone("Asia/Jerusalem"))
+    if quotes is None:
+        quotes = asyncio.run(fetch_report_quotes(now, {DEFAULT_PROFILE: COMPILED_SECTIONS}))
+    return render_report(now, quotes)
+
+# * דו״ח לכל פרופיל מאותה טבלת נתונים
+def render_profiles(now, quotes, profiles=PROFILES):
+    before = _abs_number_words.cache_info()
+    with span("render", profiles=len(profiles)):
+        texts = {name: render_report(now, quotes, sections) for name, sections in profiles.items()}
+    after = _abs_number_words.cache_info()
+    cache_result("number_words", True, count=after.hits - before.hits)
+    cache_result("number_words", False, count=after.misses - before.misses)
+    return texts
 
 # * עטיפה
 def generate_market_text():
     return get_market_report()
+
+# * טביעת אצבע לתוכן הדו״ח — ערכי הנתונים וענף המצב, בלי שורת השעה
+def snapshot_fingerprint(now, quotes, sections=COMPILED_SECTIONS):
+    # * בלי גיל הנתון — נתון שמור שרק מתיישן אינו תוכן חדש
+    data = {name: Quote(*quotes.get(ticker, EMPTY_QUOTE))[:5] for name, ticker in get_tickers_to_fetch(now, sections).items()}
+    state = get_market_state(now)
+    if state[0] == "pre":
+        state += get_tase_countdown(now)  # הספירה לאחור היא חלק מהתוכן
+    payload = json.dumps([state, sorted(data.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# * שליפה אחת משותפת לכל הפרופילים, ואז דו״ח וטביעת אצבע לכל פרופיל
+async def generate_profile_reports_async(profiles=PROFILES):
+    """מחזיר {שם פרופיל: (טקסט, טביעת אצבע)}."""
+    now = datetime.datetime.now(pytz.timezone("Asia/Jerusalem"))
+    quotes = await fetch_report_quotes(now, profiles)
+    texts = render_profiles(now, quotes, profiles)
+    return {name: (texts[name], snapshot_fingerprint(now, quotes, profiles[name])) for name in profiles}
@@ -0,0 +1,56 @@
+import asyncio
+import datetime
+import time
+import pytz
+from market_text import get_tase_session, get_ny_session
+
+# === מצב שירות: תהליך אחד שרץ ברציפות ומייצר תמונת שוק לפי לוח זמנים ===
+JERUSALEM = pytz.timezone("Asia/Jerusalem")
+DAEMON_INTERVAL_MINUTES = 15                      # מחזור קבוע, מיושר לשעון (:00, :15, ...)
+EVENT_DELAY = datetime.timedelta(minutes=1)       # ריצה נוספת דקה אחרי פתיחה/סגירה
+
+# * אירועי שוק ליום נתון: פתיחה/סגירה בתל אביב ובניו־יורק — לפי לוח המסחר
+# (אין מסחר בחג/בסוף שבוע — אין אירוע; יום מקוצר — הסגירה בשעה המוקדמת)
+def get_market_events(day):
+    return [*(get_tase_session(day) or ()), *(get_ny_session(day) or ())]
+
+# * מועד הריצה הבאה: המוקדם מבין המחזור הקבוע ואירוע השוק הקרוב
+def next_run_time(now, interval_minutes=DAEMON_INTERVAL_MINUTES):
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = now.hour * 60 + now.minute
+    tick = JERUSALEM.normalize(midnight + datetime.timedelta(minutes=(elapsed // interval_minutes + 1) * interval_minutes))
+
+    candidates = [tick]
+    for day in (now, JERUSALEM.normalize(now + datetime.timedelta(days=1))):
+        for event in get_market_events(day):
+            at = event + EVENT_DELAY
+            if at > now:
+                candidates.append(at)
+    return min(candidates)
+
+# === לולאת השירות ===
+async def run_forever(cycle, interval_minutes=DAEMON_INTERVAL_MINUTES):
+    """
+    cycle: פונקציה אסינכרונית שמריצה מחזור אחד ומחזירה {שלב: שניות}.
+    התהליך נשאר חי בין מחזורים — מודולים טעונים, sessions פתוחים ומטמונים חמים.
+    """
+    cycles = 0
+    total_seconds = 0.0
+    while True:
+        now = datetime.datetime.now(JERUSALEM)
+        run_at = next_run_time(now, interval_minutes)
+        print(f"⏳ הריצה הבאה ב־{run_at:%H:%M}")
+        await asyncio.sleep(max(0.0, (run_at - now).total_seconds()))
+
+        started = time.perf_counter()
+        try:
+            timings = await cycle() or {}
+        except Exception as e:
+            print("❌ מחזור נכשל:", e)
+            continue
+        elapsed = time.perf_counter() - started
+
+        cycles += 1
+        total_seconds += elapsed
+        stages = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
+        print(f"⏱️ מחזור {cycles}: {elapsed:.2f}s ({stages}); ממוצע {total_seconds / cycles:.2f}s")
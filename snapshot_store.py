@@ -0,0 +1,78 @@
+import json
+import os
+import time
+
+# === מצב ההעלאה האחרונה שהצליחה, לכל פרופיל (לזיהוי תוכן שלא השתנה) ===
+STATE_PATH = "cache/last_upload.json"
+DEFAULT_PROFILE = "main"
+
+def load_last_upload(path=STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_last_upload(fingerprint, profile=DEFAULT_PROFILE, path=STATE_PATH):
+    state = {name: entry for name, entry in load_last_upload(path).items() if isinstance(entry, dict)}
+    state[profile] = {"fingerprint": fingerprint, "uploaded_at": time.time()}
+    _write_atomic(path, state)
+
+# * האם אפשר לדלג: אותה טביעת אצבע, וההעלאה האחרונה לא ישנה מדי
+def is_unchanged(fingerprint, max_age, profile=DEFAULT_PROFILE, path=STATE_PATH):
+    last = load_last_upload(path).get(profile) or {}
+    if not isinstance(last, dict) or last.get("fingerprint") != fingerprint:
+        return False
+    return time.time() - last.get("uploaded_at", 0) < max_age
+
+# === המצב הטוב האחרון (last-known-good): נתונים לכל סימבול, וטקסט + WAV לכל פרופיל ===
+LAST_QUOTES_PATH = "cache/last_quotes.json"
+LAST_GOOD_DIR = "cache/last_good"
+LAST_QUOTES_MAX_AGE = 7 * 24 * 60 * 60  # נתון ישן מזה לא משמש להשלמה
+
+def _write_atomic(path, data, mode="w"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        if "b" in mode:
+            f.write(data)
+        else:
+            json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_last_quotes(path=LAST_QUOTES_PATH):
+    """מחזיר {סימבול: (שדות הנתון, זמן שמירה)}."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {symbol: (tuple(entry["quote"]), entry["at"]) for symbol, entry in json.load(f).items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+# * שמירת הנתונים התקינים של המחזור הנוכחי (מיזוג עם מה שכבר שמור)
+def save_last_quotes(quotes, path=LAST_QUOTES_PATH, now=None):
+    now = time.time() if now is None else now
+    stored = {symbol: {"quote": list(quote), "at": at} for symbol, (quote, at) in load_last_quotes(path).items()}
+    stored.update((symbol, {"quote": list(quote), "at": now}) for symbol, quote in quotes.items())
+    _write_atomic(path, stored)
+
+def _last_good_paths(profile):
+    base = os.path.join(LAST_GOOD_DIR, profile)
+    return f"{base}.json", f"{base}.wav"
+
+# * טקסט + WAV אחרונים שנוצרו בהצלחה לפרופיל
+def save_last_good(profile, text, fingerprint, wav):
+    meta_path, wav_path = _last_good_paths(profile)
+    _write_atomic(wav_path, wav, "wb")
+    _write_atomic(meta_path, {"text": text, "fingerprint": fingerprint, "saved_at": time.time()})
+
+def load_last_good(profile):
+    """מחזיר {"text", "fingerprint", "saved_at", "wav"} או None."""
+    meta_path, wav_path = _last_good_paths(profile)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            entry = json.load(f)
+        with open(wav_path, "rb") as f:
+            entry["wav"] = f.read()
+    except (OSError, ValueError):
+        return None
+    return entry
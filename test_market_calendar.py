@@ -0,0 +1,58 @@
+import datetime
+import market_calendar as mc
+
+J = mc.JERUSALEM
+
+
+def at(text):
+    return J.localize(datetime.datetime.fromisoformat(text))
+
+
+def test_hebrew_dates():
+    assert mc.rosh_hashana(2024) == datetime.date(2024, 10, 3)
+    assert mc.rosh_hashana(2026) == datetime.date(2026, 9, 12)
+    assert mc.pesach(2026) == datetime.date(2026, 4, 2)
+
+
+def test_independence_day_shift():
+    assert mc.independence_day(2025) == datetime.date(2025, 5, 1)   # ה׳ באייר בשבת → חמישי
+    assert mc.independence_day(2026) == datetime.date(2026, 4, 22)
+
+
+def test_tase_holidays_and_weekend():
+    assert mc.session(mc.TASE, datetime.date(2026, 9, 21)) is None   # יום כיפור
+    assert mc.session(mc.TASE, datetime.date(2026, 10, 18)) is None  # ראשון, אחרי המעבר
+    friday = mc.session(mc.TASE, datetime.date(2026, 10, 23))
+    assert friday[1].time() == mc.TASE_SHORT_CLOSE
+
+
+def test_nyse_observed_holiday_and_early_close():
+    assert mc.session(mc.NYSE, datetime.date(2026, 7, 3)) is None    # 4 ביולי בשבת → שישי
+    _, close = mc.session(mc.NYSE, datetime.date(2026, 11, 27))
+    assert close.time() == mc.NYSE_EARLY_CLOSE
+    assert datetime.date(2022, 12, 31) not in mc.nyse_holidays(2022)  # 1 בינואר בשבת — לא נחגג
+
+
+def test_is_open_across_dst_mismatch():
+    # ארה״ב עברה לשעון קיץ ב־8.3, ישראל רק ב־27.3: ניו־יורק נפתחת ב־15:30 שעון ישראל
+    assert mc.is_open(mc.NYSE, at("2026-03-10 15:45"))
+    assert not mc.is_open(mc.NYSE, at("2026-03-10 15:15"))
+    assert not mc.is_open(mc.NYSE, at("2026-03-10 22:15"))
+    # אחרי שגם ישראל עברה — שוב 16:30
+    assert not mc.is_open(mc.NYSE, at("2026-03-30 16:15"))
+
+
+def test_last_close_and_next_open_boundaries():
+    close = at("2026-10-19 23:00")
+    assert mc.last_close(mc.NYSE, close) == close
+    assert mc.last_close(mc.NYSE, at("2026-10-20 17:00")) == close        # באמצע הסשן הבא
+    assert mc.next_open(mc.NYSE, at("2026-10-17 12:00")) == at("2026-10-19 16:30")
+    assert mc.last_close(mc.TASE, at("2027-01-01 08:00")) == at("2026-12-31 17:25")  # מעבר שנה
+
+
+def test_is_settled():
+    friday_close = at("2026-10-16 23:00").timestamp()
+    saturday = at("2026-10-17 12:00").timestamp()
+    assert mc.is_settled("^GSPC", friday_close + 3600, saturday)
+    assert not mc.is_settled("^GSPC", friday_close + 60, saturday)       # לפני SETTLE_DELAY
+    assert not mc.is_settled("BTC-USD", friday_close + 3600, saturday)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from analytics import HIGH_MIN_BARS, HIGH_WINDOW, NEAR_HIGH_PCT, SHARP_MIN_PCT, SHARP_SIGMA, VOL_MIN_RETURNS, VOL_WINDOW
+from market_data import compute_quotes, Quote, EMPTY_QUOTE, TREND_UP, TREND_DOWN
+
+
+# * חישוב סקלרי, טור אחד בכל פעם — ה־oracle של החישוב הווקטורי:
+# pct/trend כמו get_stock_change בגרסה הקודמת, sharp/near_high לפי ההגדרות ב־analytics
+def scalar_quote(closes):
+    closes = [float(v) for v in closes if not np.isnan(v)]
+    if not closes:
+        return EMPTY_QUOTE
+    current = closes[-1]
+    if len(closes) == 1:
+        return Quote(None, round(current, 2), None)
+    prev = closes[-2]
+    pct = ((current - prev) / prev) * 100 if prev != 0 else 0.0
+    trend = None
+    if len(closes) >= 3:
+        if current > prev > closes[-3]:
+            trend = TREND_UP
+        elif current < prev < closes[-3]:
+            trend = TREND_DOWN
+
+    sharp = None
+    if len(closes) > VOL_MIN_RETURNS + 1:
+        returns = [(b - a) / a * 100 for a, b in zip(closes, closes[1:])][-VOL_WINDOW - 1:-1]
+        vol = float(np.std(returns, ddof=1))
+        if vol > 0:
+            sharp = abs(pct) >= SHARP_SIGMA * vol and abs(pct) >= SHARP_MIN_PCT
+    near_high = None
+    if len(closes) >= HIGH_MIN_BARS:
+        near_high = (current / max(closes[-HIGH_WINDOW:]) - 1) * 100 >= -NEAR_HIGH_PCT
+    return Quote(round(pct, 2), round(current, 2), trend, sharp, near_high)
+
+
+def assert_matches_scalar(closes):
+    table = compute_quotes(closes)
+    assert list(table) == list(closes.columns)
+    for symbol in closes.columns:
+        assert table[symbol] == scalar_quote(closes[symbol].tolist()), symbol
+
+
+def test_short_and_flat_columns():
+    nan = np.nan
+    closes = pd.DataFrame({
+        "EMPTY": [nan, nan, nan, nan],
+        "ONE": [nan, nan, nan, 101.5],
+        "TWO": [nan, nan, 10.0, 10.4],
+        "THREE_UP": [nan, 1.0, 2.0, 3.0],
+        "FLAT": [5.0, 5.0, 5.0, 5.0],
+        "ZERO_PREV": [1.0, 2.0, 0.0, 3.0],
+        "GAP": [3.0, nan, 2.0, 1.0],
+    }, index=pd.date_range("2026-10-12", periods=4))
+    assert_matches_scalar(closes)
+
+
+def test_no_rows():
+    closes = pd.DataFrame({"A": [], "B": []}, dtype="float64")
+    assert compute_quotes(closes) == {"A": EMPTY_QUOTE, "B": EMPTY_QUOTE}
+
+
+def test_year_with_nan_padding_matches_scalar():
+    rng = np.random.default_rng(7)
+    days = 270
+    walk = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=(days, 6)), axis=0)
+    walk[-1, 1] *= 1.08                      # קפיצה חדה ביום האחרון
+    walk[:-30, 2] = np.nan                   # היסטוריה קצרה — בלי שיא שנתי
+    walk[::9, 3] = np.nan                    # חורים באמצע הסדרה
+    walk[:, 4] = 50.0                        # סגירות זהות — תנודתיות אפס
+    walk[-1, 5] = walk[:, 5].max() * 1.001   # שיא שנתי חדש
+    closes = pd.DataFrame(walk, columns=list("ABCDEF"), index=pd.bdate_range("2025-09-01", periods=days))
+    assert_matches_scalar(closes)
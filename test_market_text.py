@@ -0,0 +1,28 @@
+from market_data import TREND_UP, TREND_DOWN
+import datetime
+from market_text import JERUSALEM, format_direction, render_intro
+
+# * הטקסט של הגרסה הקודמת (לולאה על yf.Ticker), בדיוק באותם בתים — כולל סדר הניקוד
+FEMALE_UP = "מַמְשִׁיכָה לַעֲלוֹת"
+FEMALE_DOWN = "מַמְשִׁיכָה לְרֵדֶת"
+
+
+def test_female_trend_matches_baseline():
+    assert format_direction(2.0, TREND_UP, is_female=True) == FEMALE_UP
+    assert format_direction(-2.0, TREND_DOWN, is_female=True) == FEMALE_DOWN
+
+
+def test_male_trend_unchanged():
+    assert format_direction(2.0, TREND_UP) == TREND_UP
+    assert "מַמְשִׁיךְ" not in format_direction(-2.0, TREND_DOWN, is_female=True)
+
+
+# * פתיח הדו״ח — בדיוק הבתים של הגרסה הקודמת
+INTRO_PREFIX = "הִנֵה תְמוּנַת הַשׁוּק, נָכוֹן לְשָׁעָה "
+INTRO_MINUTES = " דַּקוֹת"
+
+
+def test_intro_matches_baseline():
+    intro = render_intro(JERUSALEM.localize(datetime.datetime(2026, 10, 19, 12, 5)))
+    assert intro.startswith(INTRO_PREFIX)
+    assert INTRO_MINUTES + " " in intro
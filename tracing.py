@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# === מדידת זמנים לאורך הצינור: spans לכל שלב ולכל טיקר, סיכום JSON לכל ריצה ===
+# span = שם + משך + שדות חופשיים (symbol, bytes, cache="tts", hit=True/False...).
+# כשאין ריצה פעילה span לא רושם כלום — אפשר להשאיר את המדידות בקוד בלי עלות.
+TRACE_PATH = "cache/last_run.json"       # סיכום הריצה האחרונה
+TRACE_LOG_PATH = "cache/runs.jsonl"      # סיכום לכל ריצה, שורה לכל ריצה
+TRACE_LOG_MAX_BYTES = 5 * 1024 * 1024    # מעבר לזה היומן עובר ל־runs.jsonl.1 (הקודם נמחק) ומתחיל מחדש
+METRICS_PATH = "cache/metrics.prom"      # מצב שירות: מדדים בפורמט Prometheus (textfile collector)
+SLOWEST_SPANS = 10
+
+_lock = threading.Lock()
+_spans = None        # רשימת ה־spans של הריצה הפעילה (None — אין ריצה)
+_run_started = 0.0
+_totals = {}         # מצטבר בין ריצות (למדדי Prometheus): (מדד, תוויות) → ערך
+
+def start_run():
+    global _spans, _run_started
+    with _lock:
+        _spans = []
+        _run_started = time.perf_counter()
+
+def record(name, seconds, **attrs):
+    with _lock:
+        if _spans is not None:
+            _spans.append({"name": name, "start": time.perf_counter() - _run_started - seconds,
+                           "seconds": seconds, **attrs})
+
+# * מדידת בלוק: with span("fetch.bulk", symbols=6) as attrs: ...; attrs["bytes"] = ...
+@contextmanager
+def span(name, **attrs):
+    if _spans is None:
+        yield attrs
+        return
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - started, **attrs)
+
+# * פגיעה/החטאה במטמון (בלי משך); count — כמה פניות בבת אחת
+def cache_result(cache, hit, count=1, **attrs):
+    if count:
+        record(f"cache.{cache}", 0.0, cache=cache, hit=bool(hit), count=count, **attrs)
+
+# * סיכום: שלבים (מספר, זמן כולל, מקסימום, בתים), מטמונים, טיקרים והאיטיים ביותר
+def summarize(spans, seconds):
+    stages = {}
+    caches = {}
+    symbols = {}
+    for s in spans:
+        if "cache" in s:
+            entry = caches.setdefault(s["cache"], {"hit": 0, "miss": 0})
+            entry["hit" if s["hit"] else "miss"] += s.get("count", 1)
+            continue
+        stage = stages.setdefault(s["name"], {"count": 0, "seconds": 0.0, "max": 0.0, "bytes": 0})
+        stage["count"] += 1
+        stage["seconds"] += s["seconds"]
+        stage["max"] = max(stage["max"], s["seconds"])
+        stage["bytes"] += s.get("bytes", 0) or 0
+        if "symbol" in s:
+            symbols[s["symbol"]] = symbols.get(s["symbol"], 0.0) + s["seconds"]
+    slowest = sorted((s for s in spans if s["seconds"]), key=lambda s: s["seconds"], reverse=True)
+    return {
+        "started_at": time.time() - seconds,
+        "seconds": round(seconds, 4),
+        "stages": {name: {**v, "seconds": round(v["seconds"], 4), "max": round(v["max"], 4)} for name, v in stages.items()},
+        "caches": caches,
+        "symbols": {symbol: round(v, 4) for symbol, v in sorted(symbols.items(), key=lambda kv: -kv[1])},
+        "slowest": [{**s, "seconds": round(s["seconds"], 4), "start": round(s["start"], 4)} for s in slowest[:SLOWEST_SPANS]],
+    }
+
+# * סיום הריצה: סיכום JSON לקובץ (אחרון + יומן), עדכון המדדים המצטברים
+def finish_run(path=TRACE_PATH, log_path=TRACE_LOG_PATH, **extra):
+    global _spans
+    with _lock:
+        spans, _spans = _spans or [], None
+    summary = {**summarize(spans, time.perf_counter() - _run_started), **extra}
+    _accumulate(summary)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    _rotate(log_path)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return summary
+
+# * במצב שירות היומן נכתב בכל מחזור — גודלו חסום: קובץ נוכחי + קובץ קודם אחד
+def _rotate(log_path, max_bytes=TRACE_LOG_MAX_BYTES):
+    try:
+        if os.path.getsize(log_path) >= max_bytes:
+            os.replace(log_path, f"{log_path}.1")
+    except OSError:
+        pass
+
+# === מדדי Prometheus (פורמט טקסט) ===
+_METRIC_HELP = {
+    "market_snapshot_runs_total": ("counter", "ריצות שהסתיימו"),
+    "market_snapshot_run_seconds": ("gauge", "משך הריצה האחרונה"),
+    "market_snapshot_stage_seconds_total": ("counter", "זמן מצטבר לכל שלב"),
+    "market_snapshot_stage_calls_total": ("counter", "מספר spans לכל שלב"),
+    "market_snapshot_stage_bytes_total": ("counter", "בתים שהועברו לכל שלב"),
+    "market_snapshot_cache_requests_total": ("counter", "פניות למטמון לפי תוצאה"),
+    "market_snapshot_symbol_seconds": ("gauge", "זמן שליפה לטיקר בריצה האחרונה"),
+}
+
+def _add(metric, labels, value, replace=False):
+    key = (metric, tuple(sorted(labels.items())))
+    _totals[key] = value if replace else _totals.get(key, 0) + value
+
+def _accumulate(summary):
+    with _lock:
+        _add("market_snapshot_runs_total", {}, 1)
+        _add("market_snapshot_run_seconds", {}, summary["seconds"], replace=True)
+        for stage, v in summary["stages"].items():
+            _add("market_snapshot_stage_seconds_total", {"stage": stage}, v["seconds"])
+            _add("market_snapshot_stage_calls_total", {"stage": stage}, v["count"])
+            if v["bytes"]:
+                _add("market_snapshot_stage_bytes_total", {"stage": stage}, v["bytes"])
+        for cache, v in summary["caches"].items():
+            for result in ("hit", "miss"):
+                _add("market_snapshot_cache_requests_total", {"cache": cache, "result": result}, v[result])
+        for symbol, seconds in summary["symbols"].items():
+            _add("market_snapshot_symbol_seconds", {"symbol": symbol}, seconds, replace=True)
+
+def render_metrics():
+    with _lock:
+        totals = sorted(_totals.items())
+    lines = []
+    for metric, (kind, help_text) in _METRIC_HELP.items():
+        rows = [(labels, value) for (name, labels), value in totals if name == metric]
+        if not rows:
+            continue
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for labels, value in rows:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:g}" if label_text else f"{metric} {value:g}")
+    return "\n".join(lines) + "\n"
+
+# * כתיבה אטומית — ה־collector לא יקרא קובץ חצי כתוב
+def write_metrics(path=METRICS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
@@ -0,0 +1,72 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from tracing import record
+
+# === העלאה לימות המשיח: session משותף, ניסיונות חוזרים ופיזור לכמה שלוחות ===
+UPLOAD_URL = "https://www.call2all.co.il/ym/api/UploadFile"
+UPLOAD_FILENAME = "001.wav"
+UPLOAD_TIMEOUT = 30          # שניות לבקשה
+UPLOAD_RETRIES = 3           # ניסיונות נוספים אחרי כישלון
+UPLOAD_BACKOFF = 1.0         # המתנה בסיסית; מוכפלת בכל ניסיון (1, 2, 4...)
+UPLOAD_WORKERS = 4           # שלוחות במקביל
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+
+# * session אחד לכל התהליך, עם מאגר חיבורים keep-alive
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+# * העלאה לשלוחה אחת, עם backoff מעריכי
+def upload_wav(wav, path, token, filename=UPLOAD_FILENAME):
+    """
+    wav: bytes של WAV מוכן. גוף ה־multipart נבנה מחדש מ־BytesIO בכל ניסיון
+    (MultipartEncoder נקרא פעם אחת בלבד) ומוזרם בלי העתקה נוספת.
+    מחזיר {"path", "ok", "status", "attempts", "seconds", "error"}.
+    """
+    session = get_session()
+    started = time.perf_counter()
+    result = {"path": path, "ok": False, "status": None, "attempts": 0, "seconds": 0.0, "error": None}
+    for attempt in range(UPLOAD_RETRIES + 1):
+        if attempt:
+            time.sleep(UPLOAD_BACKOFF * 2 ** (attempt - 1))
+        result["attempts"] = attempt + 1
+        m = MultipartEncoder(fields={
+            'token': token,
+            'path': path + filename,
+            'file': (filename, io.BytesIO(wav), 'audio/wav')
+        })
+        try:
+            r = session.post(UPLOAD_URL, data=m, headers={'Content-Type': m.content_type}, timeout=UPLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            result["error"] = str(e)
+            continue
+        result["status"] = r.status_code
+        if r.ok:
+            result["ok"] = True
+            result["error"] = None
+            break
+        result["error"] = r.text
+        if r.status_code not in RETRY_STATUSES:
+            break
+    result["seconds"] = time.perf_counter() - started
+    record("upload", result["seconds"], path=path, bytes=len(wav), status=result["status"], attempts=result["attempts"], ok=result["ok"])
+    return result
+
+# * פיזור במקביל לכל השלוחות
+def upload_to_targets(wav, paths, token, filename=UPLOAD_FILENAME):
+    paths = list(paths)
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(paths))) as executor:
+        return list(executor.map(lambda path: upload_wav(wav, path, token, filename), paths))
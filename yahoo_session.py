@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from tracing import record
+
+# === חיבור משותף ל־Yahoo: session אחד לכל התהליך, עוגייה נשמרת בין ריצות, קצב בקשות מוגבל ===
+# כל yf.download / yf.Ticker מקבלים את אותו session: חיבורי keep-alive (ו־HTTP/2 ב־curl_cffi)
+# נפתחים פעם אחת, והעוגייה/crumb מול Yahoo נקבעים פעם אחת לתהליך.
+YAHOO_CACHE_DIR = "cache/yfinance"   # מטמון העוגייה ואזורי הזמן של yfinance — נשמר בין ריצות
+IMPERSONATE = "chrome"               # curl_cffi: טביעת TLS/HTTP2 של דפדפן
+POOL_SIZE = 16                       # requests (גיבוי): חיבורים פתוחים במאגר
+REQUESTS_PER_SECOND = 8              # קצב ממוצע לכל הבקשות ל־Yahoo בתהליך
+REQUESTS_BURST = 16                  # פרץ מותר (yf.download שולח בקשה לכל סימבול במקביל)
+RATE_LIMIT_COOLDOWN = 60             # שניות בלי בקשות אחרי 429
+
+_session = None
+_lock = threading.Lock()
+_tokens = float(REQUESTS_BURST)
+_refilled = time.monotonic()
+_blocked_until = 0.0
+
+# * המתנה לתור בדלי האסימונים; בזמן צינון אחרי 429 — חריגה מיד, בלי לפנות ל־Yahoo
+def throttle():
+    global _tokens, _refilled
+    waited = 0.0
+    while True:
+        with _lock:
+            now = time.monotonic()
+            if now < _blocked_until:
+                from yfinance.exceptions import YFRateLimitError
+                raise YFRateLimitError()
+            _tokens = min(REQUESTS_BURST, _tokens + (now - _refilled) * REQUESTS_PER_SECOND)
+            _refilled = now
+            if _tokens >= 1:
+                _tokens -= 1
+                break
+            wait = (1 - _tokens) / REQUESTS_PER_SECOND
+        time.sleep(wait)
+        waited += wait
+    if waited:
+        record("yahoo.throttle", waited)
+
+# * 429 מ־Yahoo: עוצרים את כל הבקשות לזמן הצינון (הדו״ח ממשיך עם המצב הטוב האחרון)
+def rate_limited(cooldown=RATE_LIMIT_COOLDOWN):
+    global _blocked_until
+    with _lock:
+        _blocked_until = max(_blocked_until, time.monotonic() + cooldown)
+    record("yahoo.rate_limited", 0.0, cooldown=cooldown)
+    print(f"⚠️ Yahoo החזיר 429 — בלי בקשות ב־{cooldown} השניות הקרובות")
+
+def _throttled(base):
+    class YahooSession(base):
+        def request(self, method, url, *args, **kwargs):
+            throttle()
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code == 429:
+                rate_limited()
+            return response
+    return YahooSession
+
+# * session אחד לכל התהליך: curl_cffi (מה ש־yfinance מעדיף), ואם אינו מותקן — requests עם מאגר חיבורים
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            import yfinance as yf
+            os.makedirs(YAHOO_CACHE_DIR, exist_ok=True)
+            yf.set_tz_cache_location(YAHOO_CACHE_DIR)
+            try:
+                from curl_cffi import requests as curl_requests
+                _session = _throttled(curl_requests.Session)(impersonate=IMPERSONATE)
+            except ImportError:
+                import requests
+                from requests.adapters import HTTPAdapter
+                _session = _throttled(requests.Session)()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                _session.mount("https://", adapter)
+    return _session